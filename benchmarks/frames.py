@@ -0,0 +1,76 @@
+"""
+Landmark upload benchmark: payload size and server parse time of a capture
+window as JSON (MediaPipe's landmark objects, as rom_tracker.js sees them)
+against the binary ROMF format in rom_core/frames.py.
+
+    python benchmarks/frames.py [--frames 90] [--repeat 200]
+
+Both parsers end with the same thing, a float array of shape
+(frames, landmarks, 4), so the times compare like for like.
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from rom_core.frames import ROM_LANDMARKS, encode_frames, parse_frames  # noqa: E402
+from rom_core.pose import LANDMARK_COUNT  # noqa: E402
+
+KEYS = ('x', 'y', 'z', 'visibility')
+
+
+def json_payload(frames, timestamps, landmarks):
+    return json.dumps({
+        'timestamps': [float(t) for t in timestamps],
+        'landmarks': list(landmarks),
+        'frames': [[dict(zip(KEYS, map(float, point))) for point in frame] for frame in frames],
+    }).encode()
+
+
+def parse_json(body):
+    data = json.loads(body)
+    return np.array([[[point[key] for key in KEYS] for point in frame] for frame in data['frames']])
+
+
+def best_time(parse, payload, repeat):
+    """Fastest of ``repeat`` parses, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(payload)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--frames', type=int, default=90, help="Frames per capture (default: 3 s at 30 fps).")
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    timestamps = np.arange(args.frames) * (1000 / 30)
+    print(f"{args.frames} frames; best of {args.repeat} parses")
+    print(f"{'format':<24}{'bytes':>10}{'gzip':>10}{'parse':>12}")
+    for name, landmarks in (('all 33 landmarks', tuple(range(LANDMARK_COUNT))), ('ROM_LANDMARKS', ROM_LANDMARKS)):
+        frames = rng.random((args.frames, len(landmarks), 4), dtype=np.float32)
+        payloads = {
+            'json': (json_payload(frames, timestamps, landmarks), parse_json),
+            'binary': (encode_frames(frames, timestamps, landmarks), lambda body: parse_frames(body).frames),
+        }
+        assert np.allclose(parse_json(payloads['json'][0]), parse_frames(payloads['binary'][0]).frames)
+        for fmt, (payload, parse) in payloads.items():
+            seconds = best_time(parse, payload, args.repeat)
+            print(f"{fmt + ', ' + name:<24}{len(payload):>10}{len(gzip.compress(payload)):>10}"
+                  f"{seconds * 1e6:>10.1f}us")
+
+
+if __name__ == '__main__':
+    main()
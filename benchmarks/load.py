@@ -0,0 +1,198 @@
+"""
+Load test: concurrent simulated patient and clinician sessions against a
+running server, reporting latency percentiles and throughput per endpoint.
+
+    python manage.py seed_cohort --patients 200
+    python manage.py runserver --noreload      (or uvicorn rom_backend.asgi:application)
+    python benchmarks/load.py [--url http://127.0.0.1:8000] [--sessions 20]
+                              [--duration 30] [--think 0] [--json out.json]
+
+Each session logs in as a random account of the seeded cohort (read from
+the same database the server uses), then requests the URLs of
+rom_core/urls.py in PATIENT_MIX or CLINICIAN_MIX proportions until the time
+is up. Redirects are not followed, so each request is timed on its own.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from http.cookiejar import CookieJar
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rom_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.urls import reverse  # noqa: E402
+
+from rom_core.models import Exercise, UserProfile  # noqa: E402
+from rom_core.seed import SEED_PASSWORD  # noqa: E402
+
+# (url name, weight, method, path args, query)
+PATIENT_MIX = (
+    ('patient_dashboard', 20, 'GET', (), ''),
+    ('rom_history_trend', 10, 'GET', (), ''),
+    ('rom_history_log', 10, 'GET', (), ''),
+    ('rom_history_log_page', 10, 'GET', (), ''),
+    ('rom_series', 15, 'GET', (), ''),
+    ('rom_series', 5, 'GET', (), 'period=week'),
+    ('rehab_program', 10, 'GET', (), ''),
+    ('save_rom_test', 3, 'JSON', (), ''),
+    ('mark_exercise_complete', 3, 'POST', ('exercise',), ''),
+)
+CLINICIAN_MIX = (
+    ('clinician_dashboard', 50, 'GET', (), ''),
+    ('view_patient', 40, 'GET', (), 'code={code}'),
+    ('export_cohort', 10, 'GET', (), 'table=warnings&patient={code}'),
+)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Session:
+    """One simulated browser: its own cookies, CSRF token and request mix."""
+
+    def __init__(self, base_url, username, mix, codes, exercise_ids):
+        self.base_url = base_url
+        self.jar = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.jar), _NoRedirect)
+        self.username = username
+        self.mix = mix
+        self.weights = [weight for _, weight, *_ in mix]
+        self.codes = codes
+        self.exercise_ids = exercise_ids
+
+    def csrf_token(self):
+        return next((cookie.value for cookie in self.jar if cookie.name == 'csrftoken'), '')
+
+    def request(self, method, path, body=None, content_type=None):
+        """(status, seconds), reading the whole body."""
+        headers = {'X-CSRFToken': self.csrf_token(), 'Referer': self.base_url + path}
+        if content_type:
+            headers['Content-Type'] = content_type
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers,
+                                         method='GET' if body is None else 'POST')
+        start = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=60) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        return status, time.perf_counter() - start
+
+    def login(self):
+        path = reverse('login')
+        self.request('GET', path)
+        form = urllib.parse.urlencode({'username': self.username, 'password': SEED_PASSWORD,
+                                       'csrfmiddlewaretoken': self.csrf_token()}).encode()
+        return self.request('POST', path, form, 'application/x-www-form-urlencoded')
+
+    def next_request(self):
+        name, _, method, args, query = random.choices(self.mix, self.weights)[0]
+        path = reverse(name, args=[random.choice(self.exercise_ids) for _ in args])
+        if query:
+            path += '?' + query.format(code=random.choice(self.codes))
+        if method == 'JSON':
+            body = json.dumps({field: round(random.uniform(20, 170), 1)
+                               for field in ('flexion', 'extension', 'abduction', 'adduction')})
+            return name, self.request(method, path, body.encode(), 'application/json')
+        if method == 'POST':
+            return name, self.request(method, path, b'', 'application/x-www-form-urlencoded')
+        return name, self.request(method, path)
+
+
+def run_session(session, deadline, think, results, lock):
+    samples = [('login', session.login())]
+    while time.monotonic() < deadline:
+        samples.append(session.next_request())
+        if think:
+            time.sleep(random.expovariate(1 / think))
+    with lock:
+        for name, sample in samples:
+            results[name].append(sample)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--sessions', type=int, default=20, help="Concurrent sessions (default: 20).")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds to run (default: 30).")
+    parser.add_argument('--think', type=float, default=0,
+                        help="Mean seconds a session waits between requests (default: 0, back to back).")
+    parser.add_argument('--clinician-share', type=float, default=0.1,
+                        help="Share of sessions that are clinicians (default: 0.1).")
+    parser.add_argument('--prefix', default='seed', help="Username prefix of the seeded cohort (default: seed).")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    accounts = list(UserProfile.objects.filter(user__username__startswith=f'{args.prefix}-')
+                    .values_list('user__username', 'role', 'unique_code'))
+    patients = [(name, code) for name, role, code in accounts if role == 'patient']
+    clinicians = [name for name, role, _ in accounts if role == 'clinician']
+    if not patients or not clinicians:
+        sys.exit(f"No seeded patients and clinicians named '{args.prefix}-...'; run manage.py seed_cohort first.")
+    codes = [code for _, code in patients]
+    exercise_ids = list(Exercise.objects.values_list('id', flat=True))
+
+    sessions = []
+    for _ in range(args.sessions):
+        if random.random() < args.clinician_share:
+            sessions.append(Session(args.url, random.choice(clinicians), CLINICIAN_MIX, codes, exercise_ids))
+        else:
+            sessions.append(Session(args.url, random.choice(patients)[0], PATIENT_MIX, codes, exercise_ids))
+
+    results, lock = defaultdict(list), threading.Lock()
+    deadline = time.monotonic() + args.duration
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run_session, args=(session, deadline, args.think, results, lock))
+               for session in sessions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {}
+    for name, samples in sorted(results.items()):
+        seconds = np.array([sample[1] for sample in samples])
+        p50, p95, p99 = np.percentile(seconds, [50, 95, 99]) * 1000
+        report[name] = {
+            'requests': len(samples), 'errors': sum(status >= 400 for status, _ in samples),
+            'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'per_second': len(samples) / elapsed,
+        }
+    total = sum(row['requests'] for row in report.values())
+
+    print(f"{args.sessions} sessions for {elapsed:.1f}s against {args.url}: {total} requests, "
+          f"{total / elapsed:.1f}/s")
+    print(f"{'endpoint':<26}{'requests':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>8}")
+    for name, row in report.items():
+        print(f"{name:<26}{row['requests']:>9}{row['errors']:>8}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}"
+              f"{row['p99_ms']:>9.1f}{row['per_second']:>8.1f}")
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump({'sessions': args.sessions, 'seconds': elapsed, 'endpoints': report}, out, indent=2)
+    return 1 if any(row['errors'] for row in report.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
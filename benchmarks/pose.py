@@ -0,0 +1,139 @@
+"""
+Angle engine benchmark: speed and accuracy of rom_core.pose on synthetic
+captures from rom_core.synthetic, CPU only and deterministic.
+
+    python benchmarks/pose.py [--repeat 5] [--json out.json]
+                              [--max-error DEG] [--min-fps FPS]
+
+Speed is frames per second for the calculateAngle() port alone, a whole
+capture through measure_capture(), a batch of equal-length captures and a
+live batch (rom_core.live.measure_frames). Accuracy is the error against the
+true angle, per scenario, of the browser's old single-frame reading (left
+side, first frame of the hold) and of measure_capture().
+
+Exits non-zero if the engine's mean error in any scenario is above
+--max-error or measure_capture() is slower than --min-fps, so the numbers
+can be tracked per commit.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rom_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from rom_core.live import LiveSession, measure_frames  # noqa: E402
+from rom_core.pose import (  # noqa: E402
+    HOLD_FRAMES, MEDIAN_FRAMES, joint_angles, joint_weights, measure_capture, peak_hold,
+    weighted_rolling_median,
+)
+from rom_core.synthetic import arm_frames, sweep  # noqa: E402
+
+FPS = 30
+TARGETS = (30, 60, 90, 120, 150, 170)
+SEEDS = 5  # captures per target and scenario
+
+# name -> arm_frames() options; the engine is told the aspect ratio
+SCENARIOS = {
+    'clean, front': {'view': 'front'},
+    'clean, side': {'view': 'side'},
+    'noise 0.005': {'view': 'front', 'noise': 0.005},
+    'dropout 10%': {'view': 'front', 'dropout': 0.1},
+    'left side hidden': {'view': 'side', 'hidden_side': 'left'},
+    '4:3 camera': {'view': 'front', 'aspect_ratio': 4 / 3},
+    'noise + dropout + hidden': {'view': 'side', 'noise': 0.003, 'dropout': 0.05, 'hidden_side': 'left'},
+}
+
+
+def best_rate(work, frames, repeat):
+    """Frames per second of the fastest of ``repeat`` runs of work()."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        work()
+        best = min(best, time.perf_counter() - start)
+    return frames / best
+
+
+def speed(repeat):
+    capture = arm_frames(sweep([120], FPS), noise=0.003, seed=1)
+    stacked = np.stack([arm_frames(sweep([target], FPS), noise=0.003, seed=i) for i, target in enumerate(TARGETS * 10)])
+
+    def batch():
+        smoothed = weighted_rolling_median(joint_angles(stacked), joint_weights(stacked), MEDIAN_FRAMES)
+        return peak_hold(smoothed, HOLD_FRAMES)
+
+    sessions = [LiveSession() for _ in range(100)]
+    live = list(stacked.reshape(-1, *stacked.shape[2:])[:len(sessions)])
+    return {
+        'calculate_angle': best_rate(lambda: joint_angles(stacked), stacked.shape[0] * stacked.shape[1], repeat),
+        'measure_capture': best_rate(lambda: measure_capture(capture), len(capture), repeat),
+        f'batch of {len(stacked)} captures': best_rate(batch, stacked.shape[0] * stacked.shape[1], repeat),
+        'live, 100 sessions': best_rate(lambda: measure_frames(sessions, live), len(live), repeat),
+    }
+
+
+def accuracy():
+    results = {}
+    hold_start = max(int(1.0 * FPS), 2)  # sweep(): the rise takes rise_seconds
+    for name, options in SCENARIOS.items():
+        browser, engine = [], []
+        for seed in range(SEEDS * len(TARGETS)):
+            target = TARGETS[seed % len(TARGETS)]
+            frames = arm_frames(sweep([target], FPS), seed=seed, **options)
+            # The browser used the left side at face value, x and y unscaled
+            browser.append(round(float(joint_angles(frames[hold_start])[0])) - target)
+            angle = measure_capture(frames, options.get('aspect_ratio', 1.0)).angle
+            engine.append(np.nan if angle is None else angle - target)
+        results[name] = {
+            'browser_mean': float(np.mean(np.abs(browser))), 'browser_max': float(np.max(np.abs(browser))),
+            'engine_mean': float(np.mean(np.abs(engine))), 'engine_max': float(np.max(np.abs(engine))),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help="Also write the results to this file.")
+    parser.add_argument('--max-error', type=float, help="Fail if the engine's mean error (degrees) is above this.")
+    parser.add_argument('--min-fps', type=float, help="Fail if measure_capture() runs below this many frames/s.")
+    args = parser.parse_args()
+
+    rates = speed(args.repeat)
+    errors = accuracy()
+    print(f"{'speed':<28}{'frames/s':>14}")
+    for name, rate in rates.items():
+        print(f"{name:<28}{rate:>14,.0f}")
+    print()
+    print(f"{'abs error, degrees':<28}{'browser mean':>14}{'max':>8}{'engine mean':>14}{'max':>8}")
+    for name, error in errors.items():
+        print(f"{name:<28}{error['browser_mean']:>14.1f}{error['browser_max']:>8.1f}"
+              f"{error['engine_mean']:>14.1f}{error['engine_max']:>8.1f}")
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump({'frames_per_second': rates, 'error_degrees': errors}, out, indent=2)
+
+    failures = []
+    if args.max_error is not None:
+        failures += [f"{name}: mean error {error['engine_mean']:.1f} is over {args.max_error}"
+                     for name, error in errors.items() if not error['engine_mean'] <= args.max_error]
+    if args.min_fps is not None and rates['measure_capture'] < args.min_fps:
+        failures.append(f"measure_capture: {rates['measure_capture']:,.0f} frames/s is under {args.min_fps:,.0f}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Startup benchmark: time and resident memory for a fresh process to run
+django.setup() and load the URLconf (and with it every view module), as a
+web worker does before its first request.
+
+    python benchmarks/startup.py [--runs 5] [--max-seconds S] [--max-rss-mb M]
+
+Exits non-zero if any LAZY_MODULES was imported at startup, or if a budget
+given on the command line is exceeded. Those subsystems must only load on
+first use (rom_core.chatbot, rom_core.reports).
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Heavy packages that only the chatbot and the report worker need
+LAZY_MODULES = ('google.generativeai', 'grpc', 'google.protobuf', 'reportlab', 'PIL')
+
+PROBE = """
+import json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rom_backend.settings')
+import django
+django.setup()
+import rom_backend.urls
+from rom_backend.wsgi import application
+seconds = time.perf_counter() - start
+with open('/proc/self/status') as status:
+    rss_kb = next(int(line.split()[1]) for line in status if line.startswith('VmRSS:'))
+print(json.dumps({
+    'seconds': seconds,
+    'rss_mb': rss_kb / 1024,
+    'modules': len(sys.modules),
+    'lazy_loaded': [name for name in %r if name in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def measure():
+    """One fresh interpreter's startup figures."""
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, help="Fail if the median startup time is above this.")
+    parser.add_argument('--max-rss-mb', type=float, help="Fail if the median RSS is above this.")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    seconds = statistics.median(run['seconds'] for run in runs)
+    rss_mb = statistics.median(run['rss_mb'] for run in runs)
+    lazy_loaded = sorted({name for run in runs for name in run['lazy_loaded']})
+    print(f"startup: {seconds * 1000:.0f} ms median over {args.runs} runs "
+          f"(min {min(run['seconds'] for run in runs) * 1000:.0f} ms)")
+    print(f"rss:     {rss_mb:.1f} MB median, {runs[0]['modules']} modules")
+
+    failures = []
+    if lazy_loaded:
+        failures.append(f"imported at startup but should load lazily: {', '.join(lazy_loaded)}")
+    if args.max_seconds is not None and seconds > args.max_seconds:
+        failures.append(f"startup {seconds:.3f}s is over the {args.max_seconds}s budget")
+    if args.max_rss_mb is not None and rss_mb > args.max_rss_mb:
+        failures.append(f"RSS {rss_mb:.1f} MB is over the {args.max_rss_mb} MB budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,11 @@
 ASGI config for rom_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server, e.g. ``uvicorn rom_backend.asgi:application``,
+so the async chatbot view streams replies without holding a worker thread.
+
+WebSocket connections to rom_core.live.LIVE_PATH get live measurement
+guidance; every other request goes to Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +18,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "rom_backend.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Needs the app registry loaded by get_asgi_application()
+from rom_core.live import LIVE_PATH, live_measurement  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        if scope["path"] == LIVE_PATH:
+            return await live_measurement(scope, receive, send)
+        await receive()  # websocket.connect
+        return await send({"type": "websocket.close"})
+    return await django_application(scope, receive, send)
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "rom_core.middleware.SQLInstrumentationMiddleware",  # first, so it sees every query
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -83,6 +86,107 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Per-process local memory; MAX_ENTRIES bounds it and the least recently
+# used entries are culled first. Point this at Redis/Memcached to share the
+# per-patient caches between workers.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "rom-core",
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    # Chatbot replies keyed by normalized question, see rom_core/chatbot.py
+    "chatbot": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "chatbot-replies",
+        "TIMEOUT": 24 * 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    },
+}
+
+
+# Chatbot
+# CHATBOT_BACKEND is "gemini", "stub" (no API calls; for load tests) or the
+# dotted path of a backend class, see rom_core/chatbot.py. Streaming replies
+# need the ASGI server (rom_backend/asgi.py) to avoid tying up a worker.
+
+CHATBOT_BACKEND = os.environ.get("CHATBOT_BACKEND", "gemini")
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
+CHATBOT_MAX_CONCURRENCY = int(os.environ.get("CHATBOT_MAX_CONCURRENCY", 16))
+CHATBOT_QUEUE_TIMEOUT = 10  # seconds a chat may wait for a free slot
+CHATBOT_STUB_DELAY = float(os.environ.get("CHATBOT_STUB_DELAY", 0.05))  # seconds per word
+
+
+# Live measurement WebSocket, see rom_core/live.py (ASGI server only)
+
+LIVE_MAX_SESSIONS = int(os.environ.get("LIVE_MAX_SESSIONS", 100))  # per process
+LIVE_QUEUE_FRAMES = 4  # frames a connection may have waiting; older ones are dropped
+LIVE_IDLE_TIMEOUT = 30  # seconds without a frame before the server hangs up
+LIVE_STEADY_DEGREES = 3.0  # how still the arm must be to count as holding
+
+
+# SQL instrumentation, see rom_core/middleware.py
+# Most queries each view may issue, by URL name, in its most expensive branch
+# (cold caches, writes it can make). Going over raises in DEBUG and test runs
+# and logs a warning otherwise; SQL_QUERY_BUDGET_RAISE=0 or 1 in the
+# environment overrides that.
+
+TESTING = sys.argv[1:2] == ["test"] or "pytest" in sys.modules
+SQL_QUERY_BUDGET_RAISE = os.environ.get("SQL_QUERY_BUDGET_RAISE", "1" if DEBUG or TESTING else "0") == "1"
+SQL_SLOWEST_QUERIES = 3  # statements listed in each request's log line
+SQL_QUERY_BUDGETS = {
+    "home": 3,
+    "register": 4,
+    "login": 10,
+    "logout": 4,
+    "patient_dashboard": 5,
+    "clinician_dashboard": 4,
+    "view_patient": 5,
+    "rom_test_intro": 2,
+    "rom_test_measure": 2,
+    "save_rom_test": 8,
+    "save_rom_test_batch": 13,
+    "rom_history_trend": 3,
+    "rom_history_log": 3,
+    "rom_history_log_page": 3,
+    "rom_series": 4,
+    "rehab_program": 8,
+    "mark_exercise_complete": 13,
+    "resolve_warning": 5,
+    "resolve_warnings": 4,
+    "measure_rom_frames": 2,
+    "export_rom_pdf": 5,
+    "report_submit": 5,
+    "report_status": 3,
+    "report_download": 3,
+    "bulk_report_submit": 5,
+    "export_cohort": 3,
+    "chatbot_cache_stats": 3,
+}
+
+# "rom_core.sql" logs a JSON line per request at INFO and over-budget
+# requests at WARNING; set SQL_LOG_LEVEL=INFO to see them all.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "rom_core.sql": {
+            "handlers": ["console"],
+            "level": os.environ.get("SQL_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,151 @@
+from datetime import timedelta
+
+from django.db.models import Count
+
+from .models import DailyAdherence, Exercise, ExerciseCompletion, RehabSchedule
+
+# Calendar ranges (days) the rehab page offers
+ADHERENCE_RANGES = (7, 30, 90, 365)
+
+# How far back the streak is computed, independent of the range on screen
+STREAK_LOOKBACK_DAYS = 365
+
+
+def daily_adherence(user, start, end):
+    """
+    Per-day completion status for ``user`` from ``start`` to ``end`` inclusive.
+
+    Uses three grouped queries whatever the length of the range. Days without
+    a RehabSchedule fall back to the full exercise list, as rehab_program does.
+    """
+    default_total = Exercise.objects.count()
+    assigned = dict(
+        RehabSchedule.objects.filter(user=user, date__range=(start, end))
+        .annotate(total=Count('exercises'))
+        .values_list('date', 'total')
+    )
+    completed = dict(
+        ExerciseCompletion.objects.filter(user=user, date__range=(start, end))
+        .values('date')
+        .annotate(done=Count('exercise', distinct=True))
+        .values_list('date', 'done')
+    )
+
+    days = []
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        total = assigned.get(day, default_total)
+        done = completed.get(day, 0)
+        days.append({
+            'date': day,
+            'assigned': total,
+            'done': done,
+            'completed': total > 0 and done == total,
+        })
+    return days
+
+
+def current_streak(days):
+    """Consecutive fully completed days at the end of ``days``."""
+    streak = 0
+    for info in reversed(days):
+        if not info['completed']:
+            break
+        streak += 1
+    return streak
+
+
+def longest_streak(days):
+    best = run = 0
+    for info in days:
+        run = run + 1 if info['completed'] else 0
+        best = max(best, run)
+    return best
+
+
+def _chain_streaks(rows, previous=None):
+    """Set ``streak`` on date-ordered DailyAdherence rows, continuing from ``previous``."""
+    for row in rows:
+        continues = previous is not None and previous.fully_done and previous.date == row.date - timedelta(days=1)
+        row.streak = (previous.streak + 1 if continues else 1) if row.fully_done else 0
+        previous = row
+    return rows
+
+
+def refresh_daily_adherence(user_id, day):
+    """
+    Recompute one patient's DailyAdherence row for ``day`` after a completion
+    or schedule change, then carry the streak through any later rows.
+    """
+    info = daily_adherence(user_id, day, day)[0]
+    previous = DailyAdherence.objects.filter(user_id=user_id, date=day - timedelta(days=1)).first()
+    row = DailyAdherence(
+        user_id=user_id,
+        date=day,
+        assigned=info['assigned'],
+        completed=info['done'],
+        fully_done=info['completed'],
+    )
+    _chain_streaks([row], previous)
+    DailyAdherence.objects.bulk_create(
+        [row],
+        update_conflicts=True,
+        unique_fields=['user', 'date'],
+        update_fields=['assigned', 'completed', 'fully_done', 'streak'],
+    )
+
+    later = list(DailyAdherence.objects.filter(user_id=user_id, date__gt=day).order_by('date'))
+    if later:
+        DailyAdherence.objects.bulk_update(_chain_streaks(later, row), ['streak'])
+
+
+def rebuild_daily_adherence(user_id, end):
+    """
+    Rebuild every DailyAdherence row of a patient up to ``end``. Only days with
+    a schedule or a completion get a row; any other day counts as not done.
+    """
+    first_days = [
+        day for day in (
+            RehabSchedule.objects.filter(user_id=user_id).order_by('date').values_list('date', flat=True).first(),
+            ExerciseCompletion.objects.filter(user_id=user_id).order_by('date').values_list('date', flat=True).first(),
+        ) if day is not None
+    ]
+    DailyAdherence.objects.filter(user_id=user_id).delete()
+    if not first_days or min(first_days) > end:
+        return 0
+
+    active_days = set(RehabSchedule.objects.filter(user_id=user_id, date__lte=end).values_list('date', flat=True))
+    active_days.update(ExerciseCompletion.objects.filter(user_id=user_id, date__lte=end).values_list('date', flat=True))
+    rows = [
+        DailyAdherence(
+            user_id=user_id,
+            date=info['date'],
+            assigned=info['assigned'],
+            completed=info['done'],
+            fully_done=info['completed'],
+        )
+        for info in daily_adherence(user_id, min(first_days), end)
+        if info['date'] in active_days
+    ]
+    DailyAdherence.objects.bulk_create(_chain_streaks(rows), batch_size=1000)
+    return len(rows)
+
+
+def adherence_calendar(user, start, end):
+    """
+    Calendar days from the materialized DailyAdherence rows (one query);
+    days without a row count as not done.
+    """
+    rows = {row.date: row for row in DailyAdherence.objects.filter(user=user, date__range=(start, end))}
+    days = []
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        row = rows.get(day)
+        days.append({
+            'date': day,
+            'assigned': row.assigned if row else None,
+            'done': row.completed if row else 0,
+            'completed': bool(row and row.fully_done),
+            'streak': row.streak if row else 0,
+        })
+    return days
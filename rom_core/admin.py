@@ -42,3 +42,36 @@ class ROMWarningAdmin(admin.ModelAdmin):
         queryset.update(resolved=False)
     mark_as_unresolved.short_description = "Mark selected warnings as unresolved"
 
+
+from .models import DailyAdherence
+
+@admin.register(DailyAdherence)
+class DailyAdherenceAdmin(admin.ModelAdmin):
+    list_display = ("user", "date", "completed", "assigned", "fully_done", "streak")
+    list_filter = ("date", "fully_done")
+    search_fields = ("user__username",)
+    ordering = ("-date", "-streak")
+    list_select_related = ("user",)
+
+
+from .models import ReportJob
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "status", "created_at", "finished_at", "expires_at")
+    list_filter = ("status",)
+    search_fields = ("user__username",)
+    exclude = ("pdf",)
+    readonly_fields = ("history_version", "error", "created_at", "started_at", "finished_at")
+    list_select_related = ("user",)
+
+
+from .models import ROMRollup
+
+@admin.register(ROMRollup)
+class ROMRollupAdmin(admin.ModelAdmin):
+    list_display = ("user", "period", "period_start", "count")
+    list_filter = ("period",)
+    search_fields = ("user__username",)
+    ordering = ("user", "period", "-period_start")
+    list_select_related = ("user",)
@@ -0,0 +1,122 @@
+"""
+LLM backends for the patient chatbot.
+
+settings.CHATBOT_BACKEND picks one: "gemini", "stub" (canned reply for load
+tests) or the dotted path of a class with the same interface, an async
+``stream(message)`` generator yielding text chunks. The backend is created
+once per process and shared by every request.
+
+Full replies are cached in the "chatbot" cache under the normalized question,
+so the same question asked again skips the model. That cache bounds its size
+(least recently used entries go first) and expires entries after its TIMEOUT.
+"""
+import asyncio
+import hashlib
+import re
+import weakref
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+class GeminiBackend:
+    def __init__(self):
+        import google.generativeai as genai
+
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+
+    async def stream(self, message):
+        response = await self.model.generate_content_async(message, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class StubBackend:
+    """Echoes the question back word by word, CHATBOT_STUB_DELAY seconds apart."""
+
+    async def stream(self, message):
+        for word in f"(stub) You asked: {message}".split(' '):
+            await asyncio.sleep(settings.CHATBOT_STUB_DELAY)
+            yield word + ' '
+
+
+BACKENDS = {
+    'gemini': GeminiBackend,
+    'stub': StubBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_backend(name=None):
+    name = name or settings.CHATBOT_BACKEND
+    backend_class = BACKENDS[name] if name in BACKENDS else import_string(name)
+    return backend_class()
+
+
+# One semaphore per event loop: under ASGI that is the whole process, while
+# the WSGI dev server runs each async view in a loop of its own
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def chat_semaphore():
+    loop = asyncio.get_running_loop()
+    if loop not in _semaphores:
+        _semaphores[loop] = asyncio.Semaphore(settings.CHATBOT_MAX_CONCURRENCY)
+    return _semaphores[loop]
+
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+
+_HITS_KEY = 'chatbot-cache:hits'
+_MISSES_KEY = 'chatbot-cache:misses'
+
+
+def normalize_prompt(message):
+    """Lower case, punctuation dropped, whitespace collapsed."""
+    return _WHITESPACE.sub(' ', _PUNCTUATION.sub(' ', message.lower())).strip()
+
+
+def reply_cache():
+    return caches['chatbot']
+
+
+def _reply_key(message):
+    digest = hashlib.sha256(normalize_prompt(message).encode()).hexdigest()
+    return f"chatbot-reply:{settings.CHATBOT_BACKEND}:{digest}"
+
+
+def _lookup(message):
+    cache = reply_cache()
+    reply = cache.get(_reply_key(message))
+    counter = _HITS_KEY if reply is not None else _MISSES_KEY
+    cache.add(counter, 0, timeout=None)
+    try:
+        cache.incr(counter)
+    except ValueError:  # evicted between add and incr
+        cache.set(counter, 1, timeout=None)
+    return reply
+
+
+# Lookup and counter update share one thread hop; Django's a* cache methods
+# would each take their own
+get_cached_reply = sync_to_async(_lookup)
+
+
+async def cache_reply(message, reply):
+    await reply_cache().aset(_reply_key(message), reply)
+
+
+def reply_cache_stats():
+    counts = reply_cache().get_many([_HITS_KEY, _MISSES_KEY])
+    hits, misses = counts.get(_HITS_KEY, 0), counts.get(_MISSES_KEY, 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else None,
+    }
@@ -0,0 +1,94 @@
+"""
+Per-patient cache of the ROM history the trend page and rom_series share.
+
+Entries live in Django's default cache (a bounded, LRU-culled local-memory
+cache unless settings say otherwise) and are dropped by rom_core.signals
+whenever one of the patient's ROMTests is saved or deleted.
+
+The rom_series ETag and the report job dedup key don't trust these entries:
+they come from rom_history_version(), one aggregate over the database, so a
+save handled by another server process changes them straight away.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import ROMTest
+from .risk import ROM_FIELDS
+
+ROM_HISTORY_TIMEOUT = 60 * 60  # seconds
+
+
+def _history_key(user_id):
+    return f"rom-history:{user_id}"
+
+
+def compute_rom_summary(tests):
+    """Latest value and trend arrow per ROM type, from oldest-first tests."""
+    latest = tests[-1] if tests else None
+    previous = tests[-2] if len(tests) >= 2 else None
+
+    rom_summary = {}
+    for rom_type in ROM_FIELDS:
+        if latest and previous:
+            diff = latest[rom_type] - previous[rom_type]
+            trend = "up" if diff > 0 else "down" if diff < 0 else "equal"
+        else:
+            trend = "equal"
+        rom_summary[rom_type] = {
+            'value': latest[rom_type] if latest else None,
+            'trend': trend
+        }
+    return rom_summary
+
+
+def load_rom_history(user_id):
+    """
+    The patient's full ROM history, oldest first, read straight from the
+    database, as a dict with: ``tests`` (row dicts usable like ROMTest in
+    templates), ``summary``, ``t`` (epoch seconds) plus one value column per
+    ROM type, and the ``version`` it was read at (see rom_history_version).
+    """
+    tests = list(
+        ROMTest.objects.filter(user_id=user_id).order_by('timestamp')
+        .values('id', 'timestamp', *ROM_FIELDS)
+    )
+    history = {
+        'tests': tests,
+        'summary': compute_rom_summary(tests),
+        't': [test['timestamp'].timestamp() for test in tests],
+        'version': _version(max((test['id'] for test in tests), default=None), len(tests)),
+    }
+    for field in ROM_FIELDS:
+        history[field] = [test[field] for test in tests]
+    return history
+
+
+def _version(latest_id, count):
+    return f"{latest_id or 0}-{count}"
+
+
+def rom_history_version(user_id):
+    """
+    Newest ROMTest id and test count of a patient, as a string, from one
+    aggregate on the (user, -timestamp, -id) index. Adding or deleting a test
+    changes it; an edit in place (e.g. in admin) does not.
+    """
+    stats = ROMTest.objects.filter(user_id=user_id).aggregate(latest_id=Max('id'), count=Count('id'))
+    return _version(stats['latest_id'], stats['count'])
+
+
+def get_rom_history(user, version=None):
+    """
+    load_rom_history() through the cache. With ``version`` (from
+    rom_history_version), a cached entry read at another version is reloaded.
+    """
+    key = _history_key(user.pk)
+    history = cache.get(key)
+    if history is None or (version is not None and history['version'] != version):
+        history = load_rom_history(user.pk)
+        cache.set(key, history, ROM_HISTORY_TIMEOUT)
+    return history
+
+
+def forget_rom_history(user_id):
+    cache.delete(_history_key(user_id))
@@ -0,0 +1,64 @@
+"""
+Downsampling of ROM time series for charts.
+
+Largest-Triangle-Three-Buckets keeps the first and last point and, from each
+bucket in between, the point forming the largest triangle with the point
+kept before it and the mean of the next bucket. Peaks and dips survive, so a
+few hundred points draw the same trend as thousands.
+"""
+import numpy as np
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Indices of at most ``threshold`` points of (x, y) chosen by LTTB.
+    ``x`` must be sorted ascending; all points are kept if there are few enough.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    bucket_size = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0  # index of the last point kept
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def downsample_series(x, columns, threshold):
+    """
+    LTTB-downsample each of ``columns`` (name -> values) against the shared
+    ``x``; returns name -> index array, chosen separately per series.
+    """
+    return {name: lttb_indices(x, values, threshold) for name, values in columns.items()}
+
+
+
+def downsample_columns(x, columns, threshold):
+    """
+    Row indices to keep, at most ``threshold`` of them, for columnar data
+    sharing one ``x`` axis: each column gets an equal share of LTTB picks and
+    the union is kept, so every column keeps its own extremes and the columns
+    stay aligned. All rows are kept if there are few enough.
+    """
+    if threshold >= len(x) or not columns:
+        return np.arange(len(x))
+    picked = downsample_series(x, columns, max(threshold // len(columns), 3))
+    return np.unique(np.concatenate(list(picked.values())))
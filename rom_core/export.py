@@ -0,0 +1,129 @@
+"""
+Cohort-wide streaming export of ROMTest, ROMWarning and RehabSessionFeedback
+rows as CSV or NDJSON, shared by the export_cohort view and command.
+
+Rows are read with ``.iterator(chunk_size=...)`` and formatted one at a time,
+so memory stays flat however many rows the export covers. Under ASGI the
+lines go through aiter_export(), since Django reads a sync iterator into a
+list there before sending anything.
+"""
+import csv
+import json
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import RehabSessionFeedback, ROMTest, ROMWarning
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+ExportTable = namedtuple('ExportTable', 'model date_field columns')
+
+# Column name -> ORM lookup, in output order
+EXPORT_TABLES = {
+    'rom_tests': ExportTable(ROMTest, 'timestamp', {
+        'id': 'id',
+        'patient_code': 'user__userprofile__unique_code',
+        'timestamp': 'timestamp',
+        'flexion': 'flexion',
+        'extension': 'extension',
+        'abduction': 'abduction',
+        'adduction': 'adduction',
+        'client_id': 'client_id',
+    }),
+    'warnings': ExportTable(ROMWarning, 'date', {
+        'id': 'id',
+        'patient_code': 'user__userprofile__unique_code',
+        'date': 'date',
+        'warning_type': 'warning_type',
+        'details': 'details',
+        'resolved': 'resolved',
+        'created_at': 'created_at',
+    }),
+    'feedback': ExportTable(RehabSessionFeedback, 'date', {
+        'id': 'id',
+        'patient_code': 'user__userprofile__unique_code',
+        'date': 'date',
+        'pain_level': 'pain_level',
+        'feedback': 'feedback',
+        'submitted_at': 'submitted_at',
+    }),
+}
+
+
+def export_queryset(table, date_from=None, date_to=None, patient_codes=None):
+    """
+    Tuples for ``table`` (a key of EXPORT_TABLES) in id order, limited to the
+    inclusive date range and the patients with the given unique codes.
+    """
+    spec = EXPORT_TABLES[table]
+    rows = spec.model.objects.all()
+    if spec.date_field == 'timestamp':
+        # Compare against datetimes so the filter stays a plain range
+        if date_from:
+            rows = rows.filter(timestamp__gte=timezone.make_aware(datetime.combine(date_from, time.min)))
+        if date_to:
+            rows = rows.filter(timestamp__lt=timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min)))
+    else:
+        if date_from:
+            rows = rows.filter(date__gte=date_from)
+        if date_to:
+            rows = rows.filter(date__lte=date_to)
+    if patient_codes:
+        rows = rows.filter(user__userprofile__unique_code__in=patient_codes)
+    return rows.order_by('id').values_list(*spec.columns.values())
+
+
+# Spreadsheet apps run a text cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_cell(value):
+    """Quote free text that Excel would read as a formula (CSV injection)."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(table, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_TABLES[table].columns)
+    for row in rows:
+        yield writer.writerow([csv_cell(value) for value in row])
+
+
+def stream_ndjson(table, rows):
+    columns = list(EXPORT_TABLES[table].columns)
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def stream_export(table, fmt, date_from=None, date_to=None, patient_codes=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Lines of the export; nothing is read until the generator is consumed."""
+    rows = export_queryset(table, date_from, date_to, patient_codes).iterator(chunk_size=chunk_size)
+    if fmt == 'csv':
+        return stream_csv(table, rows)
+    return stream_ndjson(table, rows)
+
+
+async def aiter_export(lines, batch_size=EXPORT_CHUNK_SIZE):
+    """
+    ``lines`` as an async iterator of ``batch_size``-line chunks. Each chunk is
+    pulled in Django's sync thread, where the export's database cursor lives.
+    """
+    lines = iter(lines)
+    next_chunk = sync_to_async(lambda: ''.join(islice(lines, batch_size)))
+    while chunk := await next_chunk():
+        yield chunk
@@ -0,0 +1,93 @@
+"""
+Binary upload format for a capture window of MediaPipe Pose frames, as
+encoded by encodeFrames() in rom_tracker.js.
+
+Everything is little-endian:
+
+    header      12 bytes        b'ROMF', version (u8), reserved (u8),
+                                landmark count L (u16), frame count N (u32)
+    landmarks   L bytes (u8)    MediaPipe landmark indices, zero-padded to a
+                                multiple of 4 bytes
+    timestamps  N float32       milliseconds since the capture started
+    frames      N * L * 4 f32   x, y, z, visibility of each landmark
+
+Every section starts on a 4-byte boundary, so parse_frames() can hand back
+NumPy views of the request body with np.frombuffer() instead of copies.
+"""
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from .pose import ELBOWS, HIPS, LANDMARK_COUNT, SHOULDERS
+
+FRAME_MAGIC = b'ROMF'
+FRAME_VERSION = 1
+HEADER = struct.Struct('<4sBBHI')
+FLOAT32 = np.dtype('<f4')
+
+# What rom_tracker.js sends: the three joints of both sides
+ROM_LANDMARKS = tuple(sorted(SHOULDERS + ELBOWS + HIPS))
+
+# 30 s at 30 fps
+MAX_CAPTURE_FRAMES = 900
+
+Capture = namedtuple('Capture', ['landmarks', 'timestamps', 'frames'])
+
+
+def _padded(count):
+    return (count + 3) // 4 * 4
+
+
+def parse_frames(data, max_frames=MAX_CAPTURE_FRAMES):
+    """
+    Capture of read-only views into ``data`` (bytes or any buffer):
+    ``timestamps`` has shape (N,), ``frames`` (N, L, 4). Raises ValueError
+    if the payload is malformed or holds NaN or infinite values.
+    """
+    buffer = memoryview(data)
+    if buffer.nbytes < HEADER.size:
+        raise ValueError("Payload is shorter than the frame header.")
+    magic, version, _, landmark_count, frame_count = HEADER.unpack_from(buffer)
+    if magic != FRAME_MAGIC or version != FRAME_VERSION:
+        raise ValueError("Not a version 1 ROMF payload.")
+    if not landmark_count or frame_count > max_frames:
+        raise ValueError(f"Send 1-{LANDMARK_COUNT} landmarks and at most {max_frames} frames.")
+
+    offset = HEADER.size
+    landmarks = bytes(buffer[offset:offset + landmark_count])
+    offset += _padded(landmark_count)
+    expected = offset + 4 * frame_count * (1 + landmark_count * 4)
+    if buffer.nbytes != expected:
+        raise ValueError(f"Expected {expected} bytes for {frame_count} frames, got {buffer.nbytes}.")
+    if len(set(landmarks)) != landmark_count or max(landmarks) >= LANDMARK_COUNT:
+        raise ValueError("Landmark indices must be distinct and below 33.")
+
+    timestamps = np.frombuffer(buffer, FLOAT32, frame_count, offset)
+    offset += 4 * frame_count
+    frames = np.frombuffer(buffer, FLOAT32, frame_count * landmark_count * 4, offset)
+    if not (np.isfinite(timestamps).all() and np.isfinite(frames).all()):
+        raise ValueError("Timestamps and landmark values must be finite.")
+    return Capture(tuple(landmarks), timestamps, frames.reshape(frame_count, landmark_count, 4))
+
+
+def encode_frames(frames, timestamps, landmarks=ROM_LANDMARKS):
+    """The payload for (N, L, 4) ``frames``; the Python twin of encodeFrames()."""
+    frames = np.asarray(frames, dtype=FLOAT32)
+    header = HEADER.pack(FRAME_MAGIC, FRAME_VERSION, 0, len(landmarks), len(frames))
+    return b''.join([
+        header,
+        bytes(landmarks).ljust(_padded(len(landmarks)), b'\0'),
+        np.asarray(timestamps, dtype=FLOAT32).tobytes(),
+        frames.tobytes(),
+    ])
+
+
+def full_pose(capture):
+    """
+    (N, 33, 4) float array for rom_core.pose, with the landmarks that weren't
+    sent left at zero visibility.
+    """
+    pose = np.zeros((len(capture.frames), LANDMARK_COUNT, 4))
+    pose[:, list(capture.landmarks)] = capture.frames
+    return pose
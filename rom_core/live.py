@@ -0,0 +1,222 @@
+"""
+Live ROM measurement over a raw ASGI WebSocket, routed to by
+rom_backend/asgi.py at LIVE_PATH.
+
+The browser sends each pose frame as a one-frame binary ROMF message (the
+format in rom_core/frames.py) and gets a JSON text message back per frame:
+
+    {"angle": 87.5, "side": "right", "steady": false, "dropped": 0}
+
+``angle`` is the visibility-weighted median of the last MEDIAN_FRAMES frames
+(null until a side is visible), ``steady`` turns true once it has stayed
+within LIVE_STEADY_DEGREES for HOLD_FRAMES frames, and ``dropped`` counts the
+frames skipped so far.
+
+Each connection buffers at most LIVE_QUEUE_FRAMES messages. When a client
+sends faster than the server keeps up the oldest waiting frame is dropped,
+so guidance follows the latest pose and memory per connection is bounded.
+At most LIVE_MAX_SESSIONS connections run per process; more are refused with
+close code 1013 (try again later).
+
+Frames from all connections are measured together by LiveEngine, a batch
+per event loop iteration.
+"""
+import asyncio
+import json
+import weakref
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+
+from .frames import Capture, full_pose, parse_frames
+from .pose import HOLD_FRAMES, MEDIAN_FRAMES, SIDES, joint_angles, joint_weights, weighted_rolling_median
+
+LIVE_PATH = '/ws/rom-live/'
+
+# WebSocket close codes
+NORMAL_CLOSURE = 1000
+POLICY_VIOLATION = 1008
+TRY_AGAIN_LATER = 1013
+
+_active_sessions = 0
+
+
+class LiveSession:
+    """
+    Running state of one connection: the last MEDIAN_FRAMES - 1 raw angles
+    and weights, and the last HOLD_FRAMES smoothed angles.
+    """
+
+    def __init__(self):
+        self.angles = np.full((MEDIAN_FRAMES - 1, 2), np.nan)
+        self.weights = np.zeros((MEDIAN_FRAMES - 1, 2))
+        self.smoothed = np.full((HOLD_FRAMES, 2), np.nan)
+        self.dropped = 0
+
+
+def measure_frames(sessions, poses):
+    """
+    Advance each session by one (33, 4) pose frame, all in one NumPy pass,
+    and return each session's reading.
+    """
+    poses = np.stack(poses)
+    angles = np.concatenate([np.stack([s.angles for s in sessions]), joint_angles(poses)[:, None]], axis=1)
+    weights = np.concatenate([np.stack([s.weights for s in sessions]), joint_weights(poses)[:, None]], axis=1)
+    weights = np.where(np.isnan(angles), 0.0, weights)  # e.g. coincident landmarks
+    latest = weighted_rolling_median(angles, weights, MEDIAN_FRAMES)[:, -1]
+    smoothed = np.concatenate([np.stack([s.smoothed for s in sessions])[:, 1:], latest[:, None]], axis=1)
+
+    sides = np.argmax(weights.sum(axis=1), axis=-1)
+    recent = smoothed[np.arange(len(sessions)), :, sides]
+    steady = np.ptp(recent, axis=1) <= settings.LIVE_STEADY_DEGREES  # False while any is NaN
+
+    readings = []
+    for i, session in enumerate(sessions):
+        session.angles, session.weights, session.smoothed = angles[i, 1:], weights[i, 1:], smoothed[i]
+        angle = recent[i, -1]
+        readings.append({
+            'angle': None if np.isnan(angle) else round(float(angle), 1),
+            'side': None if np.isnan(angle) else SIDES[sides[i]],
+            'steady': bool(steady[i]),
+            'dropped': session.dropped,
+        })
+    return readings
+
+
+class LiveEngine:
+    """
+    Batches the frames of every connection on an event loop: the first frame
+    in a loop iteration schedules a measure_frames() pass and every frame
+    that arrives before it runs joins it. Each connection has at most one
+    frame in flight, so the busier the clinic the bigger (and cheaper per
+    frame) the batches.
+    """
+
+    def __init__(self):
+        self.waiting = []
+
+    def measure(self, session, capture):
+        """Future for ``session``'s reading after ``capture``'s frame."""
+        loop = asyncio.get_running_loop()
+        if not self.waiting:
+            loop.call_soon(self._flush)
+        future = loop.create_future()
+        self.waiting.append((session, full_pose(capture)[0], future))
+        return future
+
+    def _flush(self):
+        batch, self.waiting = self.waiting, []
+        try:
+            readings = measure_frames([session for session, *_ in batch], [pose for _, pose, _ in batch])
+        except Exception as e:
+            readings = [e] * len(batch)
+        for (*_, future), reading in zip(batch, readings):
+            if future.done():  # connection went away
+                continue
+            if isinstance(reading, Exception):
+                future.set_exception(reading)
+            else:
+                future.set_result(reading)
+
+
+# One engine per event loop, like chat_semaphore()
+_engines = weakref.WeakKeyDictionary()
+
+
+def live_engine():
+    loop = asyncio.get_running_loop()
+    if loop not in _engines:
+        _engines[loop] = LiveEngine()
+    return _engines[loop]
+
+
+@sync_to_async
+def _session_user(scope):
+    """The user logged in with the connection's session cookie, or AnonymousUser."""
+    cookies = SimpleCookie()
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+    morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+    store = import_module(settings.SESSION_ENGINE).SessionStore(morsel.value if morsel else None)
+    return get_user(SimpleNamespace(session=store))
+
+
+def _same_origin(scope):
+    # Browsers send cookies with cross-site WebSocket handshakes; Origin tells us who opened it
+    headers = dict(scope.get('headers', []))
+    origin = headers.get(b'origin')
+    return origin is None or urlsplit(origin.decode('latin-1')).netloc == headers.get(b'host', b'').decode('latin-1')
+
+
+async def _read(receive, queue, session):
+    """Parse incoming messages into ``queue``, dropping the oldest when it is full."""
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.disconnect':
+            item = None
+        elif message.get('bytes') is None:
+            item = 'Send binary ROMF frames.'
+        else:
+            try:
+                item = parse_frames(message['bytes'], max_frames=1)
+                if not len(item.frames):
+                    item = 'Send one frame per message.'
+            except ValueError as e:
+                item = str(e)
+        if queue.full():
+            stale = queue.get_nowait()
+            if isinstance(stale, Capture):
+                session.dropped += 1
+        queue.put_nowait(item)
+        if item is None:
+            return
+
+
+async def _serve(receive, send):
+    session = LiveSession()
+    queue = asyncio.Queue(settings.LIVE_QUEUE_FRAMES)
+    reader = asyncio.create_task(_read(receive, queue, session))
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), settings.LIVE_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                await send({'type': 'websocket.close', 'code': NORMAL_CLOSURE})
+                return
+            if item is None:
+                return
+            if isinstance(item, str):
+                await send({'type': 'websocket.send', 'text': json.dumps({'error': item})})
+                continue
+            reading = await live_engine().measure(session, item)
+            await send({'type': 'websocket.send', 'text': json.dumps(reading)})
+    finally:
+        reader.cancel()
+
+
+async def live_measurement(scope, receive, send):
+    """ASGI application for one WebSocket connection to LIVE_PATH."""
+    global _active_sessions
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    user = await _session_user(scope)
+    if not user.is_authenticated or not _same_origin(scope):
+        await send({'type': 'websocket.close', 'code': POLICY_VIOLATION})
+        return
+    if _active_sessions >= settings.LIVE_MAX_SESSIONS:
+        await send({'type': 'websocket.close', 'code': TRY_AGAIN_LATER})
+        return
+
+    _active_sessions += 1
+    try:
+        await send({'type': 'websocket.accept'})
+        await _serve(receive, send)
+    finally:
+        _active_sessions -= 1
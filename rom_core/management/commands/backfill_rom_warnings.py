@@ -0,0 +1,55 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from rom_core.models import ROMTest, ROMWarning
+from rom_core.risk import find_history_warnings
+
+
+class Command(BaseCommand):
+    help = "Replay the risk rules over every patient's full ROMTest history and add missing ROMWarnings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help="Patients evaluated per worker task (default: 500).")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes; 1 evaluates in this process (default: CPU count).")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report what would be created without writing anything.")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        user_ids = list(ROMTest.objects.order_by('user_id').values_list('user_id', flat=True).distinct())
+        chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+        self.stdout.write(f"Evaluating {len(user_ids)} patients in {len(chunks)} chunks...")
+
+        if options['workers'] > 1 and len(chunks) > 1:
+            # Workers open their own connections; don't hand them ours
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+                results = pool.map(find_history_warnings, chunks)
+                created = sum(self._save(found, options['dry_run']) for found in results)
+        else:
+            created = sum(self._save(find_history_warnings(chunk), options['dry_run']) for chunk in chunks)
+
+        verb = "Would create" if options['dry_run'] else "Created"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {created} warnings."))
+
+    def _save(self, found, dry_run):
+        """Insert the warnings of one chunk that don't exist yet; returns how many."""
+        if not found:
+            return 0
+        existing = set(
+            ROMWarning.objects.filter(user_id__in={user_id for user_id, *_ in found})
+            .values_list('user_id', 'date', 'warning_type')
+        )
+        new = [
+            ROMWarning(user_id=user_id, date=day, warning_type=warning_type, details=details)
+            for user_id, day, warning_type, details in found
+            if (user_id, day, warning_type) not in existing
+        ]
+        if new and not dry_run:
+            ROMWarning.objects.bulk_create(new, batch_size=1000)
+        return len(new)
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from rom_core.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORT_TABLES, stream_export
+
+
+def _date(value):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise CommandError(f"Invalid date: {value} (use YYYY-MM-DD).")
+    return day
+
+
+class Command(BaseCommand):
+    help = "Stream ROMTest, ROMWarning or RehabSessionFeedback rows for the whole cohort as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(EXPORT_TABLES))
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--from', dest='date_from', type=_date, help="First day to include (YYYY-MM-DD).")
+        parser.add_argument('--to', dest='date_to', type=_date, help="Last day to include (YYYY-MM-DD).")
+        parser.add_argument('--patient', action='append', dest='patient_codes',
+                            help="Only this patient's unique code (repeatable).")
+        parser.add_argument('--output', help="File to write to (default: stdout).")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help=f"Rows fetched per database round trip (default: {EXPORT_CHUNK_SIZE}).")
+
+    def handle(self, *args, **options):
+        lines = stream_export(
+            options['table'], options['format'], options['date_from'], options['date_to'],
+            options['patient_codes'], options['chunk_size'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+                count = 0
+                for line in lines:
+                    out.write(line)
+                    count += 1
+            self.stdout.write(self.style.SUCCESS(f"Wrote {count} lines to {options['output']}."))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
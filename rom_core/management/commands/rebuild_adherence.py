@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from rom_core.adherence import rebuild_daily_adherence
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized DailyAdherence rows from RehabSchedule and ExerciseCompletion."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames',
+                            help="Only rebuild this patient (repeatable).")
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(
+            Q(rehabschedule__isnull=False) | Q(exercisecompletion__isnull=False)
+        ).distinct()
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        today = date.today()
+        total = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            with transaction.atomic():
+                total += rebuild_daily_adherence(user_id, today)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} daily adherence rows."))
@@ -0,0 +1,24 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rom_core.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the weekly and monthly ROMRollup rows from ROMTest."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames',
+                            help="Only rebuild this patient (repeatable).")
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(romtest__isnull=False).distinct()
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        total = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            with transaction.atomic():
+                total += rebuild_rollups(user_id)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} ROM rollup rows."))
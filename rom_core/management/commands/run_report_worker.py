@@ -0,0 +1,105 @@
+import os
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from rom_core.models import ReportJob
+from rom_core.report_jobs import (
+    build_report_zip, claim_jobs, expire_report_jobs, finish_job, requeue_stale_jobs,
+)
+from rom_core.reports import init_report_worker, render_patient_pdf
+
+
+class _InlineExecutor(Executor):
+    """Runs each task in this process as it is submitted (--workers 1)."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+
+class Command(BaseCommand):
+    help = "Build queued PDF reports (ReportJob rows) in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes; 1 renders in this process (default: CPU count).")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to wait when the queue is empty (default: 2).")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit as soon as the queue is empty instead of polling.")
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        if workers == 1:
+            init_report_worker()
+            pool = _InlineExecutor()
+        else:
+            # Workers open their own connections; don't hand them ours. With fork
+            # the whole pool starts on the first submit, so do that right away.
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=init_report_worker)
+            pool.submit(int).result()
+        with pool:
+            self.stdout.write(f"Report worker started with {workers} processes.")
+            built = failed = 0
+            while True:
+                expire_report_jobs()
+                requeue_stale_jobs()
+                job_ids = claim_jobs(workers * 2)
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                ok, bad = self._run(pool, job_ids)
+                built += ok
+                failed += bad
+
+        self.stdout.write(self.style.SUCCESS(f"Built {built} reports ({failed} failed)."))
+
+    def _run(self, pool, job_ids):
+        """
+        Render the claimed jobs, one pool task per patient so a bulk job
+        spreads over every worker; returns (built, failed) job counts.
+        """
+        jobs = {
+            job['id']: {'patients': job['patients'] or [job['user_id']], 'bulk': bool(job['patients']),
+                        'pdfs': {}, 'errors': {}}
+            for job in ReportJob.objects.filter(id__in=job_ids).values('id', 'user_id', 'patients')
+        }
+        futures = {
+            pool.submit(render_patient_pdf, user_id): job_id
+            for job_id, job in jobs.items() for user_id in job['patients']
+        }
+        built = failed = 0
+        for future in as_completed(futures):
+            job = jobs[futures[future]]
+            user_id, pdf, error = future.result()
+            if error:
+                job['errors'][user_id] = error
+            else:
+                job['pdfs'][user_id] = pdf
+            if len(job['pdfs']) + len(job['errors']) < len(job['patients']):
+                continue
+
+            job_id = futures[future]
+            if job['bulk'] and job['pdfs']:
+                finish_job(job_id, build_report_zip(job['pdfs'], job['errors']))
+            elif job['pdfs']:
+                finish_job(job_id, job['pdfs'][user_id])
+            else:
+                finish_job(job_id, None, '; '.join(job['errors'].values()))
+            if job['pdfs']:
+                built += 1
+            else:
+                failed += 1
+                self.stderr.write(f"Report {job_id} failed: {'; '.join(job['errors'].values())}")
+        return built, failed
@@ -0,0 +1,56 @@
+import time
+from collections import Counter
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from rom_core.seed import SEED_PASSWORD, create_users, seed_exercises, seed_patients
+
+
+class Command(BaseCommand):
+    help = "Seed a synthetic cohort of patients and clinicians with years of history, for local load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=100)
+        parser.add_argument('--clinicians', type=int, default=5)
+        parser.add_argument('--years', type=float, default=2.0, help="History per patient (default: 2).")
+        parser.add_argument('--tests-per-week', type=float, default=3.0,
+                            help="Average ROM tests per patient per week (default: 3).")
+        parser.add_argument('--prefix', default='seed', help="Username prefix (default: seed).")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same cohort.")
+        parser.add_argument('--chunk-patients', type=int, default=50,
+                            help="Patients written per transaction (default: 50).")
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="Rows per INSERT (default: 2000).")
+        parser.add_argument('--flush', action='store_true',
+                            help="Delete the accounts with this prefix (and their data) first.")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        existing = User.objects.filter(username__startswith=f'{prefix}-')
+        if options['flush']:
+            deleted, _ = existing.delete()
+            self.stdout.write(f"Deleted {deleted} rows of the previous '{prefix}' cohort.")
+        elif existing.exists():
+            raise CommandError(f"Accounts named '{prefix}-...' already exist; pass --flush or another --prefix.")
+
+        rng = np.random.default_rng(options['seed'])
+        started = time.perf_counter()
+        batch_size = options['batch_size']
+        exercise_ids = seed_exercises()
+        create_users(prefix, 'clinician', options['clinicians'], rng, batch_size)
+        patient_ids = create_users(prefix, 'patient', options['patients'], rng, batch_size)
+
+        totals = Counter()
+        chunk = options['chunk_patients']
+        for i in range(0, len(patient_ids), chunk):
+            totals.update(seed_patients(patient_ids[i:i + chunk], options['years'], options['tests_per_week'],
+                                        exercise_ids, rng, batch_size))
+            self.stdout.write(f"  {min(i + chunk, len(patient_ids))}/{len(patient_ids)} patients")
+
+        summary = ', '.join(f"{count} {name.replace('_', ' ')}" for name, count in totals.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['patients']} patients and {options['clinicians']} clinicians "
+            f"({summary}) in {time.perf_counter() - started:.1f}s. Password: {SEED_PASSWORD}"
+        ))
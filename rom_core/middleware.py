@@ -0,0 +1,116 @@
+"""
+Per-request SQL instrumentation.
+
+SQLInstrumentationMiddleware times every query a request runs (with
+connection.execute_wrapper, so DEBUG isn't needed) and reports:
+
+- a ``Server-Timing`` header: ``db`` (SQL time, query count) and ``app``
+  (the whole request), which browser dev tools show next to the request;
+- one JSON log line per request on the "rom_core.sql" logger, with the
+  SQL_SLOWEST_QUERIES slowest statements;
+- requests over their SQL_QUERY_BUDGETS entry (by URL name): a warning log
+  line, or QueryBudgetExceeded when SQL_QUERY_BUDGET_RAISE is on (DEBUG
+  and test runs by default).
+
+It goes first in MIDDLEWARE so session and auth queries count. Queries run
+while a streaming response is consumed happen after it returns and aren't
+counted.
+"""
+import heapq
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('rom_core.sql')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryRecord:
+    """execute_wrapper that keeps (seconds, sql) for every statement."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - start, sql))
+
+    @property
+    def seconds(self):
+        return sum(seconds for seconds, _ in self.queries)
+
+
+def _start(record):
+    # Entered on the thread that runs the view's queries, see __acall__
+    wrapper = connection.execute_wrapper(record)
+    wrapper.__enter__()
+    return wrapper
+
+
+class SQLInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        record = QueryRecord()
+        with connection.execute_wrapper(record):
+            response = self.get_response(request)
+        return self.report(request, response, record, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        # Under ASGI a request's sync code (sessions, auth, sync views) runs on
+        # one thread with its own connection, so the wrapper goes there
+        start = time.perf_counter()
+        record = QueryRecord()
+        wrapper = await sync_to_async(_start)(record)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrapper.__exit__)(None, None, None)
+        return self.report(request, response, record, time.perf_counter() - start)
+
+    def report(self, request, response, record, seconds):
+        sql_ms = record.seconds * 1000
+        timing = f'db;dur={sql_ms:.1f};desc="{len(record.queries)} queries", app;dur={seconds * 1000:.1f}'
+        response['Server-Timing'] = f"{response['Server-Timing']}, {timing}" if response.has_header('Server-Timing') else timing
+
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        budget = settings.SQL_QUERY_BUDGETS.get(url_name)
+        over_budget = budget is not None and len(record.queries) > budget
+        slowest = heapq.nlargest(settings.SQL_SLOWEST_QUERIES, record.queries, key=lambda query: query[0])
+        logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'url_name': url_name,
+            'status': response.status_code,
+            'queries': len(record.queries),
+            'budget': budget,
+            'sql_ms': round(sql_ms, 2),
+            'total_ms': round(seconds * 1000, 2),
+            'slowest': [{'ms': round(query_seconds * 1000, 2), 'sql': sql} for query_seconds, sql in slowest],
+        }))
+        if over_budget and settings.SQL_QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(
+                f"{url_name} ran {len(record.queries)} queries, over its budget of {budget}: "
+                + '; '.join(sql for _, sql in record.queries)
+            )
+        return response
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:06
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rom_core", "0006_romwarning"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="romtest",
+            name="client_id",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name="romtest",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddConstraint(
+            model_name="romtest",
+            constraint=models.UniqueConstraint(
+                fields=("user", "client_id"), name="unique_romtest_client_id"
+            ),
+        ),
+    ]
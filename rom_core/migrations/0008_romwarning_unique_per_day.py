@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicate_warnings(apps, schema_editor):
+    """Keep the oldest warning per (user, date, warning_type) before adding the constraint."""
+    ROMWarning = apps.get_model("rom_core", "ROMWarning")
+    duplicates = (
+        ROMWarning.objects.values("user", "date", "warning_type")
+        .annotate(keep_id=models.Min("id"), n=models.Count("id"))
+        .filter(n__gt=1)
+    )
+    for row in duplicates:
+        ROMWarning.objects.filter(
+            user=row["user"], date=row["date"], warning_type=row["warning_type"]
+        ).exclude(id=row["keep_id"]).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rom_core", "0007_romtest_client_id"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_warnings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="romwarning",
+            constraint=models.UniqueConstraint(
+                fields=("user", "date", "warning_type"),
+                name="unique_romwarning_per_day",
+            ),
+        ),
+    ]
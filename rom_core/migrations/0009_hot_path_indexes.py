@@ -0,0 +1,80 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:09
+
+import random
+import string
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def dedupe_unique_codes(apps, schema_editor):
+    """Blank codes become NULL and repeated codes are reissued so unique_code can be unique."""
+    UserProfile = apps.get_model("rom_core", "UserProfile")
+    UserProfile.objects.filter(unique_code="").update(unique_code=None)
+    seen = set(
+        UserProfile.objects.exclude(unique_code=None)
+        .values_list("unique_code", flat=True)
+        .distinct()
+    )
+    duplicates = (
+        UserProfile.objects.values("unique_code")
+        .annotate(n=models.Count("id"))
+        .filter(n__gt=1)
+        .exclude(unique_code=None)
+    )
+    for row in duplicates:
+        for profile in UserProfile.objects.filter(
+            unique_code=row["unique_code"]
+        ).order_by("id")[1:]:
+            code = row["unique_code"]
+            while code in seen:
+                code = "".join(
+                    random.choices(string.ascii_uppercase + string.digits, k=8)
+                )
+            seen.add(code)
+            profile.unique_code = code
+            profile.save(update_fields=["unique_code"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rom_core", "0008_romwarning_unique_per_day"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_unique_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="userprofile",
+            name="unique_code",
+            field=models.CharField(blank=True, max_length=10, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name="exercisecompletion",
+            index=models.Index(
+                fields=["user", "date"], name="completion_user_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="rehabschedule",
+            index=models.Index(fields=["user", "date"], name="schedule_user_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="rehabsessionfeedback",
+            index=models.Index(fields=["user", "date"], name="feedback_user_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="romtest",
+            index=models.Index(
+                fields=["user", "-timestamp"], name="romtest_user_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="romwarning",
+            index=models.Index(
+                condition=models.Q(("resolved", False)),
+                fields=["user", "-created_at"],
+                name="romwarning_user_open_idx",
+            ),
+        ),
+    ]
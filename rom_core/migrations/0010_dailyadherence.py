@@ -0,0 +1,101 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:13
+
+from datetime import date, timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_daily_adherence(apps, schema_editor):
+    """
+    Build the rows rom_core.adherence.rebuild_daily_adherence would, for
+    every patient, so streaks and the calendar carry existing history.
+    """
+    DailyAdherence = apps.get_model("rom_core", "DailyAdherence")
+    Exercise = apps.get_model("rom_core", "Exercise")
+    ExerciseCompletion = apps.get_model("rom_core", "ExerciseCompletion")
+    RehabSchedule = apps.get_model("rom_core", "RehabSchedule")
+
+    today = date.today()
+    default_total = Exercise.objects.count()
+    assigned = {
+        (user_id, day): total
+        for user_id, day, total in RehabSchedule.objects.filter(date__lte=today)
+        .annotate(total=models.Count("exercises"))
+        .values_list("user_id", "date", "total")
+    }
+    completed = {
+        (user_id, day): done
+        for user_id, day, done in ExerciseCompletion.objects.filter(date__lte=today)
+        .values("user_id", "date")
+        .annotate(done=models.Count("exercise", distinct=True))
+        .values_list("user_id", "date", "done")
+    }
+
+    rows, previous = [], None
+    for user_id, day in sorted(assigned.keys() | completed.keys()):
+        total = assigned.get((user_id, day), default_total)
+        done = completed.get((user_id, day), 0)
+        fully_done = total > 0 and done == total
+        continues = (
+            previous is not None
+            and previous.user_id == user_id
+            and previous.fully_done
+            and previous.date == day - timedelta(days=1)
+        )
+        streak = (previous.streak + 1 if continues else 1) if fully_done else 0
+        previous = DailyAdherence(
+            user_id=user_id, date=day, assigned=total, completed=done, fully_done=fully_done, streak=streak
+        )
+        rows.append(previous)
+    DailyAdherence.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rom_core", "0009_hot_path_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyAdherence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("assigned", models.PositiveIntegerField(default=0)),
+                ("completed", models.PositiveIntegerField(default=0)),
+                ("fully_done", models.BooleanField(default=False)),
+                ("streak", models.PositiveIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["date", "-streak"], name="adherence_date_streak_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "date"), name="unique_adherence_per_day"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_daily_adherence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rom_core", "0010_dailyadherence"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="romwarning",
+            index=models.Index(
+                condition=models.Q(("resolved", False)),
+                fields=["-created_at", "-id"],
+                name="romwarning_open_inbox_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="romwarning",
+            index=models.Index(
+                condition=models.Q(("resolved", False)),
+                fields=["warning_type", "-created_at", "-id"],
+                name="romwarning_open_type_idx",
+            ),
+        ),
+    ]
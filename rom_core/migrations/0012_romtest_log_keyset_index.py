@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rom_core", "0011_clinician_inbox_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="romtest",
+            name="romtest_user_time_idx",
+        ),
+        migrations.AddIndex(
+            model_name="romtest",
+            index=models.Index(
+                fields=["user", "-timestamp", "-id"], name="romtest_user_time_id_idx"
+            ),
+        ),
+    ]
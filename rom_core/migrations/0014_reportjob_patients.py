@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rom_core", "0013_reportjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportjob",
+            name="patients",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:31
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+ROM_FIELDS = ("flexion", "extension", "abduction", "adduction")
+
+
+def backfill_rom_rollups(apps, schema_editor):
+    """
+    Build the rows rom_core.rollups.rebuild_rollups would, for every patient,
+    so a week or month that already has tests isn't started from count 1 by
+    the next save.
+    """
+    ROMRollup = apps.get_model("rom_core", "ROMRollup")
+    ROMTest = apps.get_model("rom_core", "ROMTest")
+
+    buckets = {}
+    tests = ROMTest.objects.order_by("user_id", "timestamp").values_list("user_id", "timestamp", *ROM_FIELDS)
+    for user_id, timestamp, *values in tests.iterator(chunk_size=2000):
+        # Same local-day ISO week and calendar month as rom_core.rollups
+        day = timezone.localtime(timestamp).date() if timezone.is_aware(timestamp) else timestamp.date()
+        for period, start in (("week", day - timedelta(days=day.weekday())), ("month", day.replace(day=1))):
+            row = buckets.get((user_id, period, start))
+            if row is None:
+                seed = {f"{field}_{stat}": value for field, value in zip(ROM_FIELDS, values) for stat in ("min", "max")}
+                row = buckets[user_id, period, start] = ROMRollup(
+                    user_id=user_id, period=period, period_start=start, count=0, **seed
+                )
+            row.count += 1
+            for field, value in zip(ROM_FIELDS, values):
+                setattr(row, f"{field}_min", min(getattr(row, f"{field}_min"), value))
+                setattr(row, f"{field}_max", max(getattr(row, f"{field}_max"), value))
+                setattr(row, f"{field}_sum", getattr(row, f"{field}_sum") + value)
+    ROMRollup.objects.bulk_create(buckets.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("rom_core", "0014_reportjob_patients"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ROMRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("week", "Week"), ("month", "Month")], max_length=5
+                    ),
+                ),
+                ("period_start", models.DateField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("flexion_min", models.FloatField()),
+                ("flexion_max", models.FloatField()),
+                ("flexion_sum", models.FloatField(default=0)),
+                ("extension_min", models.FloatField()),
+                ("extension_max", models.FloatField()),
+                ("extension_sum", models.FloatField(default=0)),
+                ("abduction_min", models.FloatField()),
+                ("abduction_max", models.FloatField()),
+                ("abduction_sum", models.FloatField(default=0)),
+                ("adduction_min", models.FloatField()),
+                ("adduction_max", models.FloatField()),
+                ("adduction_sum", models.FloatField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "period", "period_start"),
+                        name="unique_rom_rollup",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rom_rollups, migrations.RunPython.noop),
+    ]
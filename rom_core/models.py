@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class UserProfile(models.Model):
     ROLE_CHOICES = [
@@ -8,18 +9,28 @@ class UserProfile(models.Model):
     ]
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
-    unique_code = models.CharField(max_length=10, blank=True, null=True)
+    unique_code = models.CharField(max_length=10, blank=True, null=True, unique=True)
 
     def __str__(self):
         return f"{self.user.username} ({self.role})"
 
 class ROMTest(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
     flexion = models.FloatField()
     extension = models.FloatField()
     abduction = models.FloatField()
     adduction = models.FloatField()
+    client_id = models.CharField(max_length=64, blank=True, null=True)  # Idempotency key from offline devices
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client_id'], name='unique_romtest_client_id'),
+        ]
+        indexes = [
+            # id breaks timestamp ties for the log's keyset pages
+            models.Index(fields=['user', '-timestamp', '-id'], name='romtest_user_time_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
@@ -38,6 +49,11 @@ class ExerciseCompletion(models.Model):
     exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE)
     date = models.DateField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='completion_user_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.exercise.name} ({self.date})"
 
@@ -46,6 +62,11 @@ class RehabSchedule(models.Model):
     date = models.DateField()
     exercises = models.ManyToManyField(Exercise)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='schedule_user_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.date} ({self.exercises.count()} exercises)"
     
@@ -56,6 +77,11 @@ class RehabSessionFeedback(models.Model):
     feedback = models.TextField(blank=True)
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='feedback_user_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.date} (Pain: {self.pain_level})"
 
@@ -66,3 +92,115 @@ class ROMWarning(models.Model):
     details = models.TextField(blank=True)
     resolved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date', 'warning_type'], name='unique_romwarning_per_day'),
+        ]
+        indexes = [
+            # Partial index: only the open warnings the dashboards list
+            models.Index(fields=['user', '-created_at'], name='romwarning_user_open_idx',
+                         condition=models.Q(resolved=False)),
+            # Clinician inbox: all open warnings, optionally by type, keyset-paged on (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='romwarning_open_inbox_idx',
+                         condition=models.Q(resolved=False)),
+            models.Index(fields=['warning_type', '-created_at', '-id'], name='romwarning_open_type_idx',
+                         condition=models.Q(resolved=False)),
+        ]
+
+# Materialized per-patient, per-day rehab adherence; kept current by rom_core.signals
+class DailyAdherence(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    date = models.DateField()
+    assigned = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    fully_done = models.BooleanField(default=False)
+    streak = models.PositiveIntegerField(default=0)  # fully done days in a row, ending on this date
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_adherence_per_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date', '-streak'], name='adherence_date_streak_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date} ({self.completed}/{self.assigned}, streak {self.streak})"
+
+# Queued PDF report; built by the run_report_worker command and kept until expires_at.
+# A clinician's bulk job lists patient user ids and produces a ZIP of their PDFs.
+class ReportJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    history_version = models.CharField(max_length=64)  # ROM history the report was asked for
+    patients = models.JSONField(default=list, blank=True)  # bulk jobs only
+    pdf = models.BinaryField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='reportjob_queue_idx'),
+            models.Index(fields=['user', 'history_version'], name='reportjob_user_version_idx'),
+            models.Index(fields=['expires_at'], name='reportjob_expiry_idx'),
+        ]
+
+    @property
+    def is_bulk(self):
+        return bool(self.patients)
+
+    def __str__(self):
+        return f"{self.user.username} - report {self.id} ({self.status})"
+
+# Per-patient weekly (ISO, starting Monday) and monthly ROM aggregates; kept
+# current by rom_core.signals so long-range views don't read every ROMTest
+class ROMRollup(models.Model):
+    WEEK = 'week'
+    MONTH = 'month'
+    PERIOD_CHOICES = [
+        (WEEK, 'Week'),
+        (MONTH, 'Month'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+    flexion_min = models.FloatField()
+    flexion_max = models.FloatField()
+    flexion_sum = models.FloatField(default=0)
+    extension_min = models.FloatField()
+    extension_max = models.FloatField()
+    extension_sum = models.FloatField(default=0)
+    abduction_min = models.FloatField()
+    abduction_max = models.FloatField()
+    abduction_sum = models.FloatField(default=0)
+    adduction_min = models.FloatField()
+    adduction_max = models.FloatField()
+    adduction_sum = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'period', 'period_start'], name='unique_rom_rollup'),
+        ]
+
+    def mean(self, rom_type):
+        return getattr(self, f'{rom_type}_sum') / self.count if self.count else None
+
+    def __str__(self):
+        return f"{self.user.username} - {self.period} of {self.period_start} ({self.count} tests)"
@@ -0,0 +1,132 @@
+"""
+Shoulder ROM angles from a whole capture window of MediaPipe Pose frames.
+
+A capture is an array of shape (frames, 33, 4) holding each landmark's
+x, y, z and visibility, as MediaPipe reports them. Any leading dimensions are
+treated as a batch, so equal-length captures stacked as (captures, frames,
+33, 4) are measured in the same NumPy pass.
+
+The angle is the 2-D hip-shoulder-elbow angle calculateAngle() in
+rom_tracker.js uses, for both sides at once. Instead of the single frame the
+browser stores, each side's series is smoothed with a visibility-weighted
+median and the result is the highest angle held through most of a
+HOLD_FRAMES window, so one jittery or half-occluded frame can't decide the
+value.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+LANDMARK_COUNT = 33
+
+# MediaPipe Pose landmark indices, (left, right)
+SHOULDERS = (11, 12)
+ELBOWS = (13, 14)
+HIPS = (23, 24)
+SIDES = ('left', 'right')
+
+# Landmarks below this visibility don't count
+MIN_VISIBILITY = 0.5
+
+# Frames in the smoothing median and in the peak hold (at 30 fps: 1/6 s, 1/2 s)
+MEDIAN_FRAMES = 5
+HOLD_FRAMES = 15
+
+RomMeasurement = namedtuple('RomMeasurement', ['angle', 'side', 'confidence', 'frames'])
+
+
+def joint_angles(frames, aspect_ratio=1.0):
+    """
+    Hip-shoulder-elbow angle in degrees for both sides of every frame, shape
+    (..., frames, 2). ``aspect_ratio`` is the camera's width / height;
+    MediaPipe normalizes x and y separately, so 1.0 reproduces the browser's
+    numbers and e.g. 640 / 480 gives the true angle.
+    """
+    xy = frames[..., :2] * np.array([aspect_ratio, 1.0])
+    hip = xy[..., HIPS, :]
+    shoulder = xy[..., SHOULDERS, :]
+    elbow = xy[..., ELBOWS, :]
+    ab = shoulder - hip
+    cb = shoulder - elbow
+    # Coincident landmarks (e.g. an all-zero frame) give NaN, not a warning
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cos = (ab * cb).sum(axis=-1) / (np.linalg.norm(ab, axis=-1) * np.linalg.norm(cb, axis=-1))
+        return np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+
+
+def joint_weights(frames, min_visibility=MIN_VISIBILITY):
+    """
+    Per frame and side, the lowest visibility of the three landmarks, or 0
+    when that is under ``min_visibility``; shape (..., frames, 2).
+    """
+    visibility = frames[..., 3]
+    weights = np.minimum.reduce([visibility[..., HIPS], visibility[..., SHOULDERS], visibility[..., ELBOWS]])
+    return np.where(weights >= min_visibility, weights, 0.0)
+
+
+def weighted_rolling_median(values, weights, width):
+    """
+    Weighted median of each run of ``width`` consecutive frames along axis -2
+    of (..., frames, sides) arrays; NaN where a run has no weight. NaN values
+    get no weight. The result has frames - width + 1 rows.
+    """
+    weights = np.where(np.isnan(values), 0.0, weights)
+    values = np.where(weights > 0, values, 0.0)
+    windows = np.lib.stride_tricks.sliding_window_view(values, width, axis=-2)
+    window_weights = np.lib.stride_tricks.sliding_window_view(weights, width, axis=-2)
+
+    order = np.argsort(windows, axis=-1)
+    sorted_values = np.take_along_axis(windows, order, axis=-1)
+    cumulative = np.cumsum(np.take_along_axis(window_weights, order, axis=-1), axis=-1)
+    total = cumulative[..., -1:]
+    pick = np.argmax(cumulative >= total / 2, axis=-1)[..., None]
+    median = np.take_along_axis(sorted_values, pick, axis=-1)[..., 0]
+    return np.where(total[..., 0] > 0, median, np.nan)
+
+
+def peak_hold(series, width):
+    """
+    Highest value held over ``width`` consecutive rows along axis -2: the
+    maximum of the rolling median, so a peak only counts if more than half of
+    the window reached it. Windows need a majority of non-NaN rows.
+    """
+    windows = np.sort(np.lib.stride_tricks.sliding_window_view(series, width, axis=-2), axis=-1)  # NaN last
+    valid = (~np.isnan(windows)).sum(axis=-1)
+    lower = np.take_along_axis(windows, np.maximum((valid - 1) // 2, 0)[..., None], axis=-1)[..., 0]
+    upper = np.take_along_axis(windows, np.maximum(valid // 2, 0)[..., None], axis=-1)[..., 0]
+    held = np.where(valid > width // 2, (lower + upper) / 2, -np.inf)
+    peak = held.max(axis=-2)
+    return np.where(np.isinf(peak), np.nan, peak)
+
+
+def measure_capture(frames, aspect_ratio=1.0, median_frames=MEDIAN_FRAMES, hold_frames=HOLD_FRAMES):
+    """
+    RomMeasurement for a (frames, 33, 4) capture: the held angle of the side
+    the camera saw best, that side's mean landmark weight as ``confidence``,
+    and how many of its frames were usable. ``angle`` is None when no side
+    was visible for long enough.
+    """
+    frames = np.asarray(frames, dtype=float)
+    if frames.ndim != 3 or frames.shape[1:] != (LANDMARK_COUNT, 4):
+        raise ValueError(f"Expected frames of shape (n, {LANDMARK_COUNT}, 4), got {frames.shape}")
+    if len(frames) < median_frames + hold_frames - 1:
+        return RomMeasurement(None, None, 0.0, 0)
+
+    angles = joint_angles(frames, aspect_ratio)
+    weights = np.where(np.isnan(angles), 0.0, joint_weights(frames))  # no angle, no confidence
+    smoothed = weighted_rolling_median(angles, weights, median_frames)
+    held = peak_hold(smoothed, hold_frames)
+
+    side = int(np.argmax(weights.sum(axis=0)))
+    angle = held[side]
+    return RomMeasurement(
+        angle=None if np.isnan(angle) else round(float(angle), 1),
+        side=SIDES[side],
+        confidence=round(float(weights[:, side].mean()), 3),
+        frames=int((weights[:, side] > 0).sum()),
+    )
+
+
+def measure_rom(captures, aspect_ratio=1.0):
+    """``captures`` maps ROM type -> frames; returns ROM type -> RomMeasurement."""
+    return {rom_type: measure_capture(frames, aspect_ratio) for rom_type, frames in captures.items()}
@@ -0,0 +1,125 @@
+"""
+Database-backed queue for PDF reports.
+
+Web requests only add ReportJob rows (submit_report_job) and read them back;
+the run_report_worker command claims pending jobs, renders them in a process
+pool and stores the PDF on the row until it expires. A patient asking again
+for an unchanged history gets the existing job instead of a new one, so a
+rush of identical requests costs one render.
+
+Clinician bulk jobs list their patients; the worker renders one PDF per
+patient across the pool and stores a ZIP of them on the job.
+"""
+import zipfile
+from datetime import timedelta
+from io import BytesIO
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .dashboard_cache import rom_history_version
+from .models import ReportJob, UserProfile
+
+# How long a finished (or failed) report is kept
+REPORT_TTL = timedelta(hours=24)
+
+# Most patients one bulk job may cover
+MAX_BULK_PATIENTS = 500
+
+# A running job whose worker died is handed out again after this long
+STALE_JOB_AFTER = timedelta(minutes=10)
+
+
+def submit_report_job(user):
+    """The user's report job for their current ROM history, creating one if needed."""
+    version = rom_history_version(user.pk)
+    job = (
+        ReportJob.objects.filter(user=user, history_version=version)
+        .exclude(status=ReportJob.FAILED)
+        .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()))
+        .defer('pdf')
+        .order_by('-id')
+        .first()
+    )
+    if job is None:
+        job = ReportJob.objects.create(user=user, history_version=version)
+    return job
+
+
+def submit_bulk_report_job(clinician, codes):
+    """
+    Queue one ZIP of reports for the patients with the given unique codes.
+    Returns (job, unknown codes); no job is created if any code is unknown.
+    """
+    codes = list(dict.fromkeys(codes))
+    found = dict(
+        UserProfile.objects.filter(unique_code__in=codes, role='patient')
+        .values_list('unique_code', 'user_id')
+    )
+    unknown = [code for code in codes if code not in found]
+    if unknown:
+        return None, unknown
+    job = ReportJob.objects.create(
+        user=clinician, history_version='bulk', patients=[found[code] for code in codes],
+    )
+    return job, []
+
+
+def build_report_zip(pdfs, errors):
+    """
+    ZIP of ``pdfs`` (patient user id -> PDF bytes), one file per patient named
+    by unique code, plus errors.txt listing any patient whose report failed.
+    """
+    names = {
+        user_id: f"{code}_{username}.pdf"
+        for user_id, code, username in UserProfile.objects.filter(user_id__in=[*pdfs, *errors])
+        .values_list('user_id', 'unique_code', 'user__username')
+    }
+    buffer = BytesIO()
+    # PDFs are compressed already; storing them is as small and much faster
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for user_id, pdf in pdfs.items():
+            archive.writestr(names.get(user_id, f"patient_{user_id}.pdf"), pdf)
+        if errors:
+            archive.writestr('errors.txt', ''.join(
+                f"{names.get(user_id, user_id)}: {error}\n" for user_id, error in errors.items()
+            ))
+    return buffer.getvalue()
+
+
+def claim_jobs(limit):
+    """
+    Mark up to ``limit`` of the oldest pending jobs as running and return
+    their ids. The conditional UPDATE lets several workers share the queue
+    without taking the same job twice.
+    """
+    claimed = []
+    candidates = ReportJob.objects.filter(status=ReportJob.PENDING).order_by('created_at').values_list('id', flat=True)
+    for job_id in candidates[:limit]:
+        if ReportJob.objects.filter(id=job_id, status=ReportJob.PENDING).update(
+                status=ReportJob.RUNNING, started_at=timezone.now()):
+            claimed.append(job_id)
+    return claimed
+
+
+def finish_job(job_id, pdf, error=''):
+    now = timezone.now()
+    ReportJob.objects.filter(id=job_id).update(
+        status=ReportJob.DONE if pdf is not None else ReportJob.FAILED,
+        pdf=pdf,
+        error=error,
+        finished_at=now,
+        expires_at=now + REPORT_TTL,
+    )
+
+
+def requeue_stale_jobs():
+    return ReportJob.objects.filter(
+        status=ReportJob.RUNNING, started_at__lt=timezone.now() - STALE_JOB_AFTER,
+    ).update(status=ReportJob.PENDING, started_at=None)
+
+
+def expire_report_jobs():
+    """Delete finished jobs past their TTL; returns how many."""
+    deleted, _ = ReportJob.objects.filter(expires_at__lt=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,155 @@
+"""
+The patient ROM PDF report: a chart of weekly means drawn server-side as
+ReportLab vector graphics and a table of monthly figures, both read from the
+ROMRollup tables rather than every ROMTest.
+
+Reports are built by the run_report_worker command (see rom_core.report_jobs),
+never in the request thread. The stylesheet and fonts are loaded once per
+process, not once per PDF, which matters when a bulk job renders hundreds.
+"""
+from datetime import datetime
+from io import BytesIO
+
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.pdfbase import pdfmetrics
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .downsample import downsample_columns
+from .risk import ROM_FIELDS
+
+# Shared by every PDF this process builds; never modified after import
+STYLES = getSampleStyleSheet()
+
+# Fonts the report uses, loaded up front so the first PDF in a worker isn't slower
+REPORT_FONTS = ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique', 'Times-Roman')
+
+# Points per line in the PDF chart (the lines share them); more would not show at this size
+PDF_CHART_MAX_POINTS = 200
+
+# Same colours as the Chart.js trend chart
+ROM_COLORS = {
+    'flexion': colors.HexColor('#4a90e2'),
+    'extension': colors.HexColor('#27ae60'),
+    'abduction': colors.HexColor('#f39c12'),
+    'adduction': colors.HexColor('#e74c3c'),
+}
+
+
+def rom_chart_drawing(history, width=450, height=220):
+    """
+    Line chart of every ROM type over time from columnar data (``t`` plus one
+    column per ROM type, as in the ROM history or rollup_series), downsampled
+    with LTTB.
+    """
+    drawing = Drawing(width, height)
+    if not history['count']:
+        return drawing
+
+    keep = downsample_columns(
+        history['t'], {field: history[field] for field in ROM_FIELDS}, PDF_CHART_MAX_POINTS
+    )
+    plot = LinePlot()
+    plot.x, plot.y = 40, 40
+    plot.width, plot.height = width - 60, height - 70
+    plot.data = [
+        [(history['t'][i], history[field][i]) for i in keep] for field in ROM_FIELDS
+    ]
+    for i, field in enumerate(ROM_FIELDS):
+        plot.lines[i].strokeColor = ROM_COLORS[field]
+        plot.lines[i].strokeWidth = 1.5
+    plot.xValueAxis.labelTextFormat = lambda t: datetime.fromtimestamp(t).strftime('%Y-%m-%d')
+    plot.xValueAxis.labels.fontSize = 7
+    plot.xValueAxis.maximumTicks = 6
+    plot.yValueAxis.labels.fontSize = 7
+    drawing.add(plot)
+
+    legend = Legend()
+    legend.x, legend.y = 40, height - 12
+    legend.alignment = 'right'
+    legend.columnMaximum = 1
+    legend.fontSize = 8
+    legend.colorNamePairs = [(ROM_COLORS[field], field.title()) for field in ROM_FIELDS]
+    drawing.add(legend)
+    return drawing
+
+
+def _monthly_cell(row, field):
+    return f"{row.mean(field):.1f} ({getattr(row, f'{field}_min'):.0f}-{getattr(row, f'{field}_max'):.0f})"
+
+
+def build_rom_pdf(username, weekly, monthly):
+    """
+    ``weekly`` is rollup_series() data for the chart, ``monthly`` the
+    patient's monthly ROMRollup rows, oldest first.
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = STYLES
+    story = []
+
+    # Title and user info
+    story.append(Paragraph("Shoulder ROM Report", styles['Title']))
+    story.append(Spacer(1, 20))
+    story.append(Paragraph(f"Patient: {username}", styles['Normal']))
+    story.append(Spacer(1, 10))
+
+    story.append(Paragraph("Weekly average ROM", styles['Heading3']))
+    story.append(rom_chart_drawing(weekly))
+    story.append(Spacer(1, 16))
+
+    # Monthly table: mean (min-max) per ROM type
+    story.append(Paragraph("Monthly summary, mean (min-max) in degrees", styles['Heading3']))
+    table_data = [["Month", "Tests", "Flexion", "Extension", "Abduction", "Adduction"]]
+    for row in monthly:
+        table_data.append([
+            row.period_start.strftime("%Y-%m"),
+            str(row.count),
+            *(_monthly_cell(row, field) for field in ROM_FIELDS),
+        ])
+    table = Table(table_data, hAlign='LEFT')
+    table.setStyle(TableStyle([
+        ("BACKGROUND", (0,0), (-1,0), colors.lightblue),
+        ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
+        ("FONTNAME", (0,0), (-1,0), "Helvetica-Bold"),
+        ("ALIGN", (1,1), (-1,-1), "CENTER"),
+    ]))
+    story.append(table)
+    story.append(Spacer(1, 24))
+
+    story.append(Paragraph("Thank you for using the Shoulder ROM Tracker!", styles['Italic']))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def init_report_worker():
+    """Pool initializer: set Django up (when spawned) and load the report fonts."""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    for font in REPORT_FONTS:
+        pdfmetrics.getFont(font)
+
+
+def render_patient_pdf(user_id):
+    """
+    Build one patient's PDF. Returns (user_id, pdf bytes or None, error).
+    Runs in a run_report_worker process.
+    """
+    from django.contrib.auth.models import User
+    from .models import ROMRollup
+    from .rollups import rollup_series
+
+    try:
+        username = User.objects.values_list('username', flat=True).get(id=user_id)
+        weekly = rollup_series(user_id, ROMRollup.WEEK)
+        monthly = ROMRollup.objects.filter(user_id=user_id, period=ROMRollup.MONTH).order_by('period_start')
+        return user_id, build_rom_pdf(username, weekly, monthly), ''
+    except Exception as exc:
+        return user_id, None, f"{type(exc).__name__}: {exc}"
@@ -0,0 +1,115 @@
+"""
+Frozen-shoulder risk rules, expressed as a table and evaluated with NumPy.
+
+Every rule looks at the newest ``window`` measurements of one ROM field.
+Windows are stored newest first, one per row of a 2-D array (NaN where a
+patient has fewer measurements), so a single call evaluates a rule for any
+number of patients or history positions at once.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+ROM_FIELDS = ('flexion', 'extension', 'abduction', 'adduction')
+
+# Rule kinds
+ALL_BELOW = 'all_below'                    # every value in the window < threshold
+DROP_VS_PRIOR_MEAN = 'drop_vs_prior_mean'  # newest < threshold * mean(older values)
+
+RiskRule = namedtuple('RiskRule', ['warning_type', 'field', 'kind', 'threshold', 'window'])
+
+# Edit thresholds as needed for your clinic!
+RISK_RULES = (
+    RiskRule("Flexion Low", 'flexion', ALL_BELOW, 90, 3),
+    RiskRule("Extension Low", 'extension', ALL_BELOW, 30, 3),
+    RiskRule("Abduction Low", 'abduction', ALL_BELOW, 90, 3),
+    # Threshold is low because normal adduction is up to 30
+    RiskRule("Adduction Low", 'adduction', ALL_BELOW, 10, 3),
+    RiskRule("Abduction Dropped >50%", 'abduction', DROP_VS_PRIOR_MEAN, 0.5, 3),
+)
+
+
+def max_window(rules=RISK_RULES):
+    return max(rule.window for rule in rules)
+
+
+def history_windows(values, width):
+    """
+    For one patient's chronological values, return the newest-first window
+    ending at every measurement, shape (len(values), width).
+    """
+    padded = np.concatenate([np.full(width - 1, np.nan), np.asarray(values, dtype=float)])
+    return np.lib.stride_tricks.sliding_window_view(padded, width)[:, ::-1]
+
+
+def evaluate_rule(rule, windows):
+    """Boolean mask of the rows of ``windows`` that trigger ``rule``."""
+    w = windows[:, :rule.window]
+    complete = ~np.isnan(w).any(axis=1)
+    with np.errstate(invalid='ignore'):
+        if rule.kind == ALL_BELOW:
+            hit = (w < rule.threshold).all(axis=1)
+        elif rule.kind == DROP_VS_PRIOR_MEAN:
+            prior_mean = w[:, 1:].mean(axis=1)
+            hit = (prior_mean > 0) & (w[:, 0] < rule.threshold * prior_mean)
+        else:
+            raise ValueError(f"Unknown risk rule kind: {rule.kind}")
+    return complete & hit
+
+
+def evaluate_rules(windows_by_field, rules=RISK_RULES):
+    """Evaluate every rule; ``windows_by_field`` maps ROM field -> window array."""
+    return {rule: evaluate_rule(rule, windows_by_field[rule.field]) for rule in rules}
+
+
+def rule_details(rule, window):
+    """Human-readable ROMWarning.details for one triggering window."""
+    values = [float(v) for v in window[:rule.window]]
+    if rule.kind == DROP_VS_PRIOR_MEAN:
+        prior_mean = sum(values[1:]) / len(values[1:])
+        return f"Today: {values[0]:.1f}, Prev avg: {prior_mean:.1f}"
+    return f"Last {rule.window}: {values}"
+
+
+def find_history_warnings(user_ids, rules=RISK_RULES):
+    """
+    Replay ``rules`` over the full ROMTest history of ``user_ids`` as if each
+    test had just been saved. Returns (user_id, date, warning_type, details)
+    tuples, keeping the first trigger per user, day and warning type.
+
+    Used by the backfill_rom_warnings command; safe to run in a worker process.
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    from .models import ROMTest
+
+    rows = list(
+        ROMTest.objects.filter(user_id__in=user_ids)
+        .order_by('user_id', 'timestamp', 'id')
+        .values_list('user_id', 'timestamp', *ROM_FIELDS)
+    )
+    if not rows:
+        return []
+
+    width = max_window(rules)
+    user_col = np.array([row[0] for row in rows])
+    values = np.array([row[2:] for row in rows], dtype=float)
+    starts = np.flatnonzero(np.r_[True, user_col[1:] != user_col[:-1]])
+    ends = np.r_[starts[1:], len(rows)]
+
+    # One window per test for every patient in the chunk, stacked per field
+    windows_by_field = {
+        field: np.concatenate([history_windows(values[s:e, col], width) for s, e in zip(starts, ends)])
+        for col, field in enumerate(ROM_FIELDS)
+    }
+
+    found = {}
+    for rule, mask in evaluate_rules(windows_by_field, rules).items():
+        for i in np.flatnonzero(mask):
+            key = (int(user_col[i]), rows[i][1].date(), rule.warning_type)
+            if key not in found:
+                found[key] = rule_details(rule, windows_by_field[rule.field][i])
+    return [key + (details,) for key, details in found.items()]
+
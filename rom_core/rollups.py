@@ -0,0 +1,137 @@
+"""
+Weekly and monthly ROM rollups (ROMRollup): count plus min, max and sum per
+ROM type for each patient, ISO week and calendar month in local time.
+
+A new ROMTest is folded into its two buckets with in-place UPDATEs. Edits,
+deletes and bulk uploads recompute only the buckets they touch from the raw
+tests, and rebuild_rollups() recomputes a patient from scratch.
+"""
+from datetime import datetime, time, timedelta
+from itertools import groupby
+
+import numpy as np
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from .models import ROMRollup, ROMTest
+from .risk import ROM_FIELDS
+
+PERIODS = (ROMRollup.WEEK, ROMRollup.MONTH)
+
+STAT_FIELDS = [f'{field}_{stat}' for field in ROM_FIELDS for stat in ('min', 'max', 'sum')]
+
+
+def period_start(day, period):
+    if period == ROMRollup.WEEK:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(start, period):
+    """First day of the next period."""
+    if period == ROMRollup.WEEK:
+        return start + timedelta(days=7)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def _local_day(timestamp):
+    return timezone.localtime(timestamp).date() if timezone.is_aware(timestamp) else timestamp.date()
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _aggregate(user_id, period, start=None, end=None):
+    """
+    ROMRollup rows computed from the raw tests, for periods in [start, end).
+    Tests are read in index order and bucketed here, with the same local-day
+    rule as add_to_rollups(), so no GROUP BY sort is needed.
+    """
+    tests = ROMTest.objects.filter(user_id=user_id)
+    if start:
+        tests = tests.filter(timestamp__gte=_day_start(start))
+    if end:
+        tests = tests.filter(timestamp__lt=_day_start(end))
+    tests = tests.order_by('timestamp').values_list('timestamp', *ROM_FIELDS)
+
+    rows = []
+    for bucket, group in groupby(tests.iterator(), key=lambda test: period_start(_local_day(test[0]), period)):
+        values = np.array([test[1:] for test in group], dtype=float)
+        stats = {}
+        for i, field in enumerate(ROM_FIELDS):
+            stats[f'{field}_min'] = values[:, i].min()
+            stats[f'{field}_max'] = values[:, i].max()
+            stats[f'{field}_sum'] = values[:, i].sum()
+        rows.append(ROMRollup(user_id=user_id, period=period, period_start=bucket, count=len(values), **stats))
+    return rows
+
+
+def add_to_rollups(test):
+    """Fold one newly created ROMTest into its week and month."""
+    day = _local_day(test.timestamp)
+    starts = {period: period_start(day, period) for period in PERIODS}
+    seed = {f'{field}_{stat}': getattr(test, field) for field in ROM_FIELDS for stat in ('min', 'max')}
+    ROMRollup.objects.bulk_create(
+        [ROMRollup(user_id=test.user_id, period=period, period_start=start, **seed) for period, start in starts.items()],
+        ignore_conflicts=True,
+    )
+    changes = {'count': F('count') + 1}
+    for field in ROM_FIELDS:
+        value = Value(float(getattr(test, field)))
+        changes[f'{field}_min'] = Least(F(f'{field}_min'), value)
+        changes[f'{field}_max'] = Greatest(F(f'{field}_max'), value)
+        changes[f'{field}_sum'] = F(f'{field}_sum') + value
+    for period, start in starts.items():
+        ROMRollup.objects.filter(user_id=test.user_id, period=period, period_start=start).update(**changes)
+
+
+def refresh_rollups(user_id, timestamps):
+    """Recompute the buckets containing ``timestamps`` from the raw tests."""
+    days = {_local_day(timestamp) for timestamp in timestamps}
+    if not days:
+        return
+    for period in PERIODS:
+        first = period_start(min(days), period)
+        end = period_end(period_start(max(days), period), period)
+        rows = _aggregate(user_id, period, first, end)
+        ROMRollup.objects.filter(
+            user_id=user_id, period=period, period_start__gte=first, period_start__lt=end,
+        ).exclude(period_start__in=[row.period_start for row in rows]).delete()
+        ROMRollup.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user', 'period', 'period_start'],
+            update_fields=['count', *STAT_FIELDS],
+        )
+
+
+def rebuild_rollups(user_id):
+    """Recompute every rollup of a patient; returns how many rows were written."""
+    ROMRollup.objects.filter(user_id=user_id).delete()
+    rows = [row for period in PERIODS for row in _aggregate(user_id, period)]
+    ROMRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rollup_series(user, period, start=None, end=None):
+    """
+    Columnar rollups for charts: ``t`` (period start, epoch seconds),
+    ``count``, then the mean, min and max of each ROM type.
+    """
+    rows = ROMRollup.objects.filter(user=user, period=period).order_by('period_start')
+    if start:
+        rows = rows.filter(period_start__gte=period_start(start, period))
+    if end:
+        rows = rows.filter(period_start__lte=end)
+    rows = list(rows)
+    data = {
+        't': [int(_day_start(row.period_start).timestamp()) for row in rows],
+        'count': [row.count for row in rows],
+    }
+    for field in ROM_FIELDS:
+        data[field] = [row.mean(field) for row in rows]
+        data[f'{field}_min'] = [getattr(row, f'{field}_min') for row in rows]
+        data[f'{field}_max'] = [getattr(row, f'{field}_max') for row in rows]
+    return data
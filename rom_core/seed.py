@@ -0,0 +1,178 @@
+"""
+Synthetic cohort for load testing on a local database: patients and
+clinicians with years of ROM tests, rehab schedules, exercise completions,
+session feedback and the warnings the risk rules raise on that history.
+
+Used by the seed_cohort command and benchmarks/load.py. Rows are written
+with bulk_create, ``chunk_patients`` patients per transaction, so memory
+stays flat however big the cohort is. bulk_create sends no signals, so each
+chunk's DailyAdherence and ROMRollup rows are rebuilt afterwards. Every
+value comes from one seeded numpy Generator, so a seed gives the same
+cohort each time.
+"""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .adherence import rebuild_daily_adherence
+from .models import (
+    Exercise, ExerciseCompletion, RehabSchedule, RehabSessionFeedback, ROMTest, ROMWarning, UserProfile,
+)
+from .risk import ROM_FIELDS, find_history_warnings
+from .rollups import rebuild_rollups
+
+# Every seeded account logs in with this password
+SEED_PASSWORD = 'seed-password'
+
+# Used when the exercise catalogue is empty
+SEED_EXERCISES = (
+    ('Pendulum swings', 'Lean forward and let the arm swing in small circles.'),
+    ('Wall walk', 'Walk your fingers up a wall as far as is comfortable.'),
+    ('Towel stretch', 'Hold a towel behind your back and pull it up gently with the other hand.'),
+    ('Cross-body reach', 'Lift the arm across the chest with the other hand.'),
+    ('External rotation', 'Elbow at your side, rotate the forearm outwards against a band.'),
+)
+
+FEEDBACK_TEXT = ('', '', 'Felt stiff this morning.', 'Easier than last week.', 'Sore after the wall walk.',
+                 'Slept badly, shoulder ached.', 'Good session.')
+
+# Fully recovered range, degrees
+NORMAL_ROM = {'flexion': 170, 'extension': 50, 'abduction': 170, 'adduction': 40}
+
+SETBACK_SHARE = 0.15        # patients whose range drops for a while (warnings)
+SCHEDULED_DAY_SHARE = 5 / 7
+FEEDBACK_DAY_SHARE = 0.3    # of the days with a completion
+RESOLVED_SHARE = 0.8        # of warnings older than RESOLVE_AFTER
+RESOLVE_AFTER = timedelta(days=30)
+
+CODE_ALPHABET = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'))
+
+
+def seed_usernames(prefix, role, count):
+    width = 5 if role == 'patient' else 3
+    return [f'{prefix}-{role}-{i:0{width}d}' for i in range(1, count + 1)]
+
+
+def _unique_codes(count, rng):
+    taken = set(UserProfile.objects.exclude(unique_code=None).values_list('unique_code', flat=True))
+    codes = []
+    while len(codes) < count:
+        code = ''.join(rng.choice(CODE_ALPHABET, 8))
+        if code not in taken:
+            taken.add(code)
+            codes.append(code)
+    return codes
+
+
+@lru_cache(maxsize=None)
+def seed_password_hash():
+    # Hashed once and shared by every account; PBKDF2 per user would dominate
+    return make_password(SEED_PASSWORD)
+
+
+def create_users(prefix, role, count, rng, batch_size):
+    """User and UserProfile rows; returns the new users' ids."""
+    password = seed_password_hash()
+    usernames = seed_usernames(prefix, role, count)
+    User.objects.bulk_create([User(username=name, password=password) for name in usernames], batch_size=batch_size)
+    ids = list(User.objects.filter(username__in=usernames).order_by('username').values_list('id', flat=True))
+    codes = _unique_codes(count, rng) if role == 'patient' else [None] * count
+    UserProfile.objects.bulk_create([
+        UserProfile(user_id=user_id, role=role, unique_code=code) for user_id, code in zip(ids, codes)
+    ], batch_size=batch_size)
+    return ids
+
+
+def seed_exercises():
+    if not Exercise.objects.exists():
+        Exercise.objects.bulk_create([Exercise(name=name, description=text) for name, text in SEED_EXERCISES])
+    return list(Exercise.objects.values_list('id', flat=True))
+
+
+def rom_curve(days, rng):
+    """
+    (len(days), 4) ROM values for a patient recovering over ``days`` (days
+    since their first test): exponential recovery, measurement noise and,
+    for some patients, a setback of a few weeks.
+    """
+    normal = np.array([NORMAL_ROM[field] for field in ROM_FIELDS], dtype=float)
+    start = normal * rng.uniform(0.35, 0.7)
+    end = normal * rng.uniform(0.85, 1.0)
+    recovery = start + (end - start) * (1 - np.exp(-days[:, None] / rng.uniform(60, 365)))
+    if rng.random() < SETBACK_SHARE and len(days):
+        onset = rng.uniform(0, days[-1])
+        setback = (days >= onset) & (days < onset + rng.integers(7, 22))
+        recovery[setback] *= rng.uniform(0.4, 0.6)
+    return np.round(recovery + rng.normal(0, 0.04, recovery.shape) * normal, 1)
+
+
+def patient_rows(user_id, first_day, last_day, tests_per_week, exercise_ids, rng):
+    """Unsaved ROMTest, RehabSchedule (with their exercise ids), completion and feedback rows."""
+    tz = timezone.get_current_timezone()
+    days = np.arange((last_day - first_day).days + 1)
+    test_days = days[rng.random(len(days)) < tests_per_week / 7]
+    minutes = rng.integers(7 * 60, 21 * 60, len(test_days))
+    values = rom_curve(test_days, rng)
+    tests = [
+        ROMTest(user_id=user_id, timestamp=datetime.combine(first_day + timedelta(days=int(day)),
+                                                            time(minute // 60, minute % 60), tz),
+                **dict(zip(ROM_FIELDS, map(float, row))))
+        for day, minute, row in zip(test_days, minutes, values)
+    ]
+
+    adherence = rng.uniform(0.3, 0.95)
+    schedules, completions, feedback = [], [], []
+    for day in days[rng.random(len(days)) < SCHEDULED_DAY_SHARE]:
+        day = first_day + timedelta(days=int(day))
+        chosen = rng.choice(exercise_ids, min(len(exercise_ids), rng.integers(2, 5)), replace=False)
+        schedules.append((RehabSchedule(user_id=user_id, date=day), chosen))
+        done = chosen[rng.random(len(chosen)) < adherence]
+        completions += [ExerciseCompletion(user_id=user_id, exercise_id=int(ex), date=day) for ex in done]
+        if len(done) and rng.random() < FEEDBACK_DAY_SHARE:
+            pain = int(np.clip(rng.normal(7 - 5 * (day - first_day).days / max(len(days), 1), 1.5), 0, 10))
+            feedback.append(RehabSessionFeedback(user_id=user_id, date=day, pain_level=pain,
+                                                 feedback=str(rng.choice(FEEDBACK_TEXT))))
+    return tests, schedules, completions, feedback
+
+
+def seed_patients(user_ids, years, tests_per_week, exercise_ids, rng, batch_size):
+    """History for one chunk of patients, in one transaction; returns row counts."""
+    today = date.today()
+    span = int(years * 365)
+    tests, schedules, completions, feedback = [], [], [], []
+    for user_id in user_ids:
+        # Patients joined at different times during the first half of the span
+        first_day = today - timedelta(days=span - int(rng.integers(0, span // 2 + 1)))
+        rows = patient_rows(user_id, first_day, today, tests_per_week, exercise_ids, rng)
+        for bucket, new in zip((tests, schedules, completions, feedback), rows):
+            bucket += new
+
+    with transaction.atomic():
+        ROMTest.objects.bulk_create(tests, batch_size=batch_size)
+        RehabSchedule.objects.bulk_create([schedule for schedule, _ in schedules], batch_size=batch_size)
+        Through = RehabSchedule.exercises.through
+        Through.objects.bulk_create([
+            Through(rehabschedule_id=schedule.pk, exercise_id=int(ex)) for schedule, chosen in schedules for ex in chosen
+        ], batch_size=batch_size)
+        ExerciseCompletion.objects.bulk_create(completions, batch_size=batch_size)
+        RehabSessionFeedback.objects.bulk_create(feedback, batch_size=batch_size)
+
+        # The warnings the risk rules would have raised as the tests came in
+        warnings = [
+            ROMWarning(user_id=user_id, date=day, warning_type=warning_type, details=details,
+                       resolved=day < today - RESOLVE_AFTER and rng.random() < RESOLVED_SHARE)
+            for user_id, day, warning_type, details in find_history_warnings(user_ids)
+        ]
+        ROMWarning.objects.bulk_create(warnings, batch_size=batch_size)
+
+        for user_id in user_ids:
+            rebuild_daily_adherence(user_id, today)
+            rebuild_rollups(user_id)
+
+    return {'rom_tests': len(tests), 'schedules': len(schedules), 'completions': len(completions),
+            'feedback': len(feedback), 'warnings': len(warnings)}
@@ -0,0 +1,41 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .adherence import refresh_daily_adherence
+from .dashboard_cache import forget_rom_history
+from .models import ExerciseCompletion, RehabSchedule, ROMTest
+from .rollups import add_to_rollups, rebuild_rollups, refresh_rollups
+
+
+@receiver(post_save, sender=ROMTest)
+def romtest_saved(sender, instance, created, **kwargs):
+    forget_rom_history(instance.user_id)
+    if created:
+        add_to_rollups(instance)
+    else:
+        rebuild_rollups(instance.user_id)  # the old timestamp's buckets are unknown here
+
+
+@receiver(post_delete, sender=ROMTest)
+def romtest_deleted(sender, instance, **kwargs):
+    forget_rom_history(instance.user_id)
+    refresh_rollups(instance.user_id, [instance.timestamp])
+
+
+# Keep DailyAdherence current on completion and schedule edits
+
+@receiver(post_save, sender=ExerciseCompletion)
+@receiver(post_delete, sender=ExerciseCompletion)
+@receiver(post_save, sender=RehabSchedule)
+@receiver(post_delete, sender=RehabSchedule)
+def adherence_source_changed(sender, instance, **kwargs):
+    refresh_daily_adherence(instance.user_id, instance.date)
+
+
+@receiver(m2m_changed, sender=RehabSchedule.exercises.through)
+def schedule_exercises_changed(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        return  # edited from the Exercise side; rebuild_adherence picks that up
+    refresh_daily_adherence(instance.user_id, instance.date)
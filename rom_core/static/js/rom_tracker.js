@@ -30,6 +30,58 @@ function getCSRFToken() {
         ?.split('=')[1];
 }
 
+// --- Capture window upload (binary format, see rom_core/frames.py) ---
+const ROM_LANDMARKS = [11, 12, 13, 14, 23, 24]; // shoulders, elbows, hips (left, right)
+const FRAME_HEADER_BYTES = 12;
+const CAPTURE_MS = 3000;          // how long to record once the countdown ends
+const MAX_CAPTURE_FRAMES = 900;
+const LIVE_MAX_BUFFERED = 4096;   // bytes; skip live frames while the socket is backed up
+
+function romLandmarkValues(landmarks) {
+    return ROM_LANDMARKS.flatMap(i => {
+        const lm = landmarks[i];
+        return [lm.x, lm.y, lm.z, lm.visibility ?? 0];
+    });
+}
+
+// values: Float32Array of x, y, z, visibility per landmark per frame
+function encodeFrames(landmarkIndices, timestamps, values) {
+    const frameCount = timestamps.length;
+    const landmarkBytes = Math.ceil(landmarkIndices.length / 4) * 4;
+    const buffer = new ArrayBuffer(FRAME_HEADER_BYTES + landmarkBytes + 4 * (frameCount + values.length));
+    const view = new DataView(buffer);
+    "ROMF".split("").forEach((c, i) => view.setUint8(i, c.charCodeAt(0)));
+    view.setUint8(4, 1); // version
+    view.setUint16(6, landmarkIndices.length, true);
+    view.setUint32(8, frameCount, true);
+    new Uint8Array(buffer, FRAME_HEADER_BYTES, landmarkIndices.length).set(landmarkIndices);
+
+    let offset = FRAME_HEADER_BYTES + landmarkBytes;
+    for (const t of timestamps) {
+        view.setFloat32(offset, t, true);
+        offset += 4;
+    }
+    for (const v of values) {
+        view.setFloat32(offset, v, true);
+        offset += 4;
+    }
+    return buffer;
+}
+
+function measureOnServer(romType, timestamps, values) {
+    return fetch(`/rom-test/frames/${romType}/`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/octet-stream',
+            'X-CSRFToken': getCSRFToken()
+        },
+        body: encodeFrames(ROM_LANDMARKS, timestamps, values)
+    })
+    .then(res => res.json())
+    .then(data => data.angle ?? null)
+    .catch(() => null);
+}
+
 function startROMTracking(romType, onComplete) {
     const videoElement = document.getElementById('pose-video');
     const countdownElement = document.getElementById('countdown');
@@ -39,8 +91,47 @@ function startROMTracking(romType, onComplete) {
     let finalAngle = null;
     let countdownInterval = null;
 
+    // Frames recorded after the countdown, sent to the server in one upload
+    const captureValues = new Float32Array(MAX_CAPTURE_FRAMES * ROM_LANDMARKS.length * 4);
+    const captureTimes = [];
+    let captureStart = null;
+    let firstAngle = null;
+
+    // Live guidance from the server when it runs under ASGI (rom_core/live.py)
+    let live = null;
+    let liveReading = null;
+    try {
+        live = new WebSocket(`${location.protocol === 'https:' ? 'wss' : 'ws'}://${location.host}/ws/rom-live/`);
+        live.onmessage = (event) => { liveReading = JSON.parse(event.data); };
+        live.onerror = () => { live = null; };
+    } catch (e) {
+        live = null;
+    }
+
+    function liveText(angle) {
+        if (!liveReading || liveReading.angle === null) return `${angle}°`;
+        return `${Math.round(liveReading.angle)}° ${liveReading.steady ? '(holding steady)' : '(hold still...)'}`;
+    }
+
+    function finishCapture() {
+        finalAngle = firstAngle;
+        if (live) live.close();
+        resultElement.innerText = "Calculating...";
+        const values = captureValues.subarray(0, captureTimes.length * ROM_LANDMARKS.length * 4);
+        measureOnServer(romType, captureTimes, values).then(serverAngle => {
+            // Fall back to the single-frame browser angle if the server had none
+            if (serverAngle !== null) finalAngle = Math.round(serverAngle);
+            resultElement.innerText = `Measured ${romType.toUpperCase()} Angle: ${finalAngle}°`;
+            saveAngleResult(romType, finalAngle);
+
+            setTimeout(() => {
+                if (onComplete) onComplete();
+            }, 2000);
+        });
+    }
+
     function onResults(results) {
-        if (!results.poseLandmarks) return;
+        if (!results.poseLandmarks || finalAngle !== null) return;
 
         const landmarks = results.poseLandmarks;
         const shoulder = landmarks[11]; // Left shoulder
@@ -48,17 +139,26 @@ function startROMTracking(romType, onComplete) {
         const hip = landmarks[23];      // Left hip
 
         const angle = calculateAngle(hip, shoulder, elbow);
+        const values = romLandmarkValues(landmarks);
 
-        if (countdown <= 0 && finalAngle === null) {
-            finalAngle = angle;
-            resultElement.innerText = `Measured ${romType.toUpperCase()} Angle: ${finalAngle}°`;
-            saveAngleResult(romType, finalAngle);
+        if (live && live.readyState === WebSocket.OPEN && live.bufferedAmount < LIVE_MAX_BUFFERED) {
+            live.send(encodeFrames(ROM_LANDMARKS, [performance.now()], values));
+        }
 
-            setTimeout(() => {
-                if (onComplete) onComplete();
-            }, 2000);
-        } else if (finalAngle === null) {
-            resultElement.innerText = `Live ${romType.toUpperCase()} Angle: ${angle}°`;
+        if (countdown <= 0) {
+            const now = performance.now();
+            if (captureStart === null) {
+                captureStart = now;
+                firstAngle = angle;
+            }
+            captureValues.set(values, captureTimes.length * ROM_LANDMARKS.length * 4);
+            captureTimes.push(now - captureStart);
+            resultElement.innerText = `Hold... ${romType.toUpperCase()} Angle: ${liveText(angle)}`;
+            if (now - captureStart >= CAPTURE_MS || captureTimes.length === MAX_CAPTURE_FRAMES) {
+                finishCapture();
+            }
+        } else {
+            resultElement.innerText = `Live ${romType.toUpperCase()} Angle: ${liveText(angle)}`;
         }
     }
 
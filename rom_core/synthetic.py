@@ -0,0 +1,93 @@
+"""
+Deterministic synthetic MediaPipe Pose frames for tests and benchmarks.
+
+sweep() builds a true shoulder-angle trajectory (raise to each target, hold,
+lower) and arm_frames() turns any trajectory into (frames, 33, 4) landmark
+arrays like the browser uploads, with optional tracking noise, dropout and
+low visibility. The same arguments and seed always give the same frames, so
+accuracy figures can be compared between commits.
+"""
+import numpy as np
+
+from .pose import ELBOWS, HIPS, LANDMARK_COUNT, SHOULDERS
+
+# Camera view each ROM test is done in: flexion/extension from the side,
+# abduction/adduction from the front
+ROM_VIEWS = {'flexion': 'side', 'extension': 'side', 'abduction': 'front', 'adduction': 'front'}
+
+REST_ANGLE = 10.0  # arm hanging by the side
+
+# Body proportions in normalized image units (height 1)
+SHOULDER_Y = 0.35
+HIP_Y = 0.65
+SHOULDER_HALF_WIDTH = 0.1
+UPPER_ARM = 0.15
+FOREARM = 0.14
+WRISTS = (15, 16)
+
+HIDDEN_NOISE = 0.03
+
+
+def sweep(targets, fps=30, rise_seconds=1.0, hold_seconds=1.0):
+    """
+    True shoulder angle per frame, in degrees: from REST_ANGLE up to each
+    target in turn (eased), held for ``hold_seconds``, then back down.
+    """
+    rise = np.sin(np.linspace(0, np.pi / 2, max(int(rise_seconds * fps), 2))) ** 2
+    hold = max(int(hold_seconds * fps), 1)
+    parts = []
+    for target in targets:
+        up = REST_ANGLE + (target - REST_ANGLE) * rise
+        parts += [up, np.full(hold, float(target)), up[::-1]]
+    return np.concatenate(parts)
+
+
+def arm_frames(angles, view='front', noise=0.0, dropout=0.0, visibility=0.95, hidden_side=None,
+               aspect_ratio=1.0, seed=0):
+    """
+    (frames, 33, 4) landmarks of a person raising both arms to ``angles``.
+
+    ``noise`` is the standard deviation of the landmark jitter (image units),
+    ``dropout`` the chance per frame and side that tracking loses the arm
+    (its landmarks jump and their visibility collapses), ``visibility`` the
+    visibility of tracked landmarks and ``hidden_side`` ('left' or 'right')
+    a side the camera barely sees (low visibility, guessed positions). x is
+    divided by ``aspect_ratio`` the way MediaPipe normalizes a wide frame.
+    """
+    rng = np.random.default_rng(seed)
+    angles = np.radians(np.asarray(angles, dtype=float))
+    frames = np.zeros((len(angles), LANDMARK_COUNT, 4))
+    centre = 0.5 * aspect_ratio
+
+    # Head and legs stand still; only their visibility matters
+    frames[:, :11, :2] = centre, SHOULDER_Y - 0.12
+    frames[:, 25:, :2] = centre, 0.9
+    frames[..., 3] = visibility
+
+    for side, shoulder, elbow, wrist, hip in zip((0, 1), SHOULDERS, ELBOWS, WRISTS, HIPS):
+        # From the front the arms go out sideways (mirrored); from the side
+        # both swing forward and the shoulders overlap
+        if view == 'front':
+            x, out = centre + (SHOULDER_HALF_WIDTH if side == 0 else -SHOULDER_HALF_WIDTH), (1 if side == 0 else -1)
+        else:
+            x, out = centre, 1
+        frames[:, shoulder, :2] = x, SHOULDER_Y
+        frames[:, hip, :2] = x, HIP_Y
+        direction = np.stack([out * np.sin(angles), np.cos(angles)], axis=-1)
+        frames[:, elbow, :2] = frames[:, shoulder, :2] + UPPER_ARM * direction
+        frames[:, wrist, :2] = frames[:, elbow, :2] + FOREARM * direction
+        frames[:, 17 + side:23:2, :2] = frames[:, wrist, None, :2]  # hand points
+
+    frames[..., :3] += rng.normal(0.0, noise, frames[..., :3].shape) if noise else 0.0
+    for side, joints in enumerate(zip(SHOULDERS, ELBOWS, HIPS)):
+        joints = list(joints)
+        if hidden_side == ('left', 'right')[side]:
+            # Guessed positions for joints the camera can't see
+            frames[:, joints, :2] += rng.normal(0.0, HIDDEN_NOISE, (len(frames), 3, 2))
+            frames[:, joints, 3] = rng.uniform(0.05, 0.4, (len(frames), 3))
+        lost = rng.random(len(frames)) < dropout
+        frames[np.ix_(lost, joints, [0, 1])] += rng.normal(0.0, 0.1, (lost.sum(), 3, 2))
+        frames[np.ix_(lost, joints, [3])] = rng.uniform(0.0, 0.3, (lost.sum(), 3, 1))
+
+    frames[..., 0] /= aspect_ratio
+    return frames
@@ -1,3 +1,1122 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import re
+import subprocess
+import sys
+import warnings
+import zipfile
+from datetime import date, datetime, timedelta
+from importlib import import_module
+from io import BytesIO, StringIO
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rom_backend.asgi import application
+
+from .models import (
+    DailyAdherence, Exercise, ExerciseCompletion, RehabSchedule, RehabSessionFeedback, ReportJob, ROMRollup,
+    ROMTest, ROMWarning, UserProfile,
+)
+from .adherence import rebuild_daily_adherence
+from .dashboard_cache import get_rom_history
+from .downsample import downsample_columns, lttb_indices
+from .frames import ROM_LANDMARKS, encode_frames
+from .live import LIVE_PATH
+from .middleware import QueryBudgetExceeded
+from .pose import LANDMARK_COUNT, measure_capture, measure_rom
+from .report_jobs import STALE_JOB_AFTER, claim_jobs
+from .risk import RISK_RULES, ROM_FIELDS, find_history_warnings
+from .rollups import STAT_FIELDS, rebuild_rollups, refresh_rollups, rollup_series
+from .seed import SEED_PASSWORD
+from .synthetic import arm_frames, sweep
+from .urls import urlpatterns
+from .utils import check_frozen_shoulder_risk
+from .views import CHART_MAX_POINTS, ROM_LOG_PAGE_SIZE, WARNING_PAGE_SIZE
+
+# Small catalogue tables that every patient shares; scanning them is fine.
+SCAN_ALLOWED_TABLES = {'rom_core_exercise'}
+
+# Most queries each view may issue, by URL name (also enforced by
+# rom_core.middleware). The count must also stay the same when the
+# patient's history grows (no N+1).
+QUERY_BUDGETS = settings.SQL_QUERY_BUDGETS
+
+SCAN_RE = re.compile(r'^SCAN (\w+)')
+
+
+class ClinicTestCase(TestCase):
+    """A patient with some history and a schedule for today, another patient and a clinician, logged in."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = User.objects.create_user('patient', password='pw')
+        UserProfile.objects.create(user=cls.patient, role='patient', unique_code='PATIENT1')
+        cls.clinician = User.objects.create_user('clinician', password='pw')
+        UserProfile.objects.create(user=cls.clinician, role='clinician')
+        cls.exercises = [
+            Exercise.objects.create(name=f'Exercise {i}', description='...') for i in range(3)
+        ]
+        schedule = RehabSchedule.objects.create(user=cls.patient, date=date.today())
+        schedule.exercises.set(cls.exercises[:2])
+
+        # Another patient so per-user filters have something to skip
+        other = User.objects.create_user('other', password='pw')
+        UserProfile.objects.create(user=other, role='patient', unique_code='OTHER001')
+        cls.add_history(other, 10)
+        cls.add_history(cls.patient, 3)
+        cls.report = ReportJob.objects.create(user=cls.patient, history_version='test', status=ReportJob.DONE,
+                                              pdf=b'%PDF-1.4 test')
+
+    @staticmethod
+    def add_history(user, days):
+        start = timezone.now() - timedelta(days=days + 400)
+        ROMTest.objects.bulk_create([
+            ROMTest(user=user, timestamp=start + timedelta(days=i),
+                    flexion=100 + i % 50, extension=40, abduction=120, adduction=20)
+            for i in range(days)
+        ])
+        ROMWarning.objects.bulk_create([
+            ROMWarning(user=user, date=(start + timedelta(days=i)).date(), warning_type='Flexion Low')
+            for i in range(days)
+        ], ignore_conflicts=True)
+
+    def setUp(self):
+        cache.clear()
+        self.patient_client = Client()
+        self.patient_client.force_login(self.patient)
+        self.clinician_client = Client()
+        self.clinician_client.force_login(self.clinician)
+
+
+# Async and streamed: not run through the budget suite (see ChatbotTests)
+UNBUDGETED_VIEWS = {'chatbot_ask'}
+
+
+class ViewQueryBudgetTests(ClinicTestCase):
+    """
+    Runs every view in rom_core/urls.py, checks its query count against
+    QUERY_BUDGETS and fails if SQLite's EXPLAIN QUERY PLAN shows a full scan
+    or a temp sort on a per-patient table.
+    """
+
+    def requests(self):
+        """
+        (url name, client, method, path, data) for every view we can run
+        offline, including each view's most expensive branch.
+        """
+        warning = ROMWarning.objects.filter(user=self.patient).first()
+        measurement = {'flexion': 120, 'extension': 40, 'abduction': 120, 'adduction': 20}
+        low = {'flexion': 80, 'extension': 20, 'abduction': 80, 'adduction': 5}  # trips the risk rules
+        batch = [
+            {'client_id': f'kiosk-{ROMTest.objects.count()}-{i}', 'timestamp': timezone.now().isoformat(), **low}
+            for i in range(5)
+        ]
+        capture = encode_frames(arm_frames(np.full(60, 120.0))[:, ROM_LANDMARKS], np.arange(60) * 33.3)
+        return [
+            ('home', self.patient_client, 'get', reverse('home'), None),
+            ('register', Client(), 'get', reverse('register'), None),
+            ('login', Client(), 'get', reverse('login'), None),
+            ('login', Client(), 'post', reverse('login'), {'username': 'patient', 'password': 'pw'}),
+            ('register', Client(), 'post', reverse('register'),
+             {'username': f'new{User.objects.count()}', 'email': 'new@example.com', 'password': 'pw', 'role': 'patient'}),
+            ('patient_dashboard', self.patient_client, 'get', reverse('patient_dashboard'), None),
+            ('clinician_dashboard', self.clinician_client, 'get', reverse('clinician_dashboard'), None),
+            ('clinician_dashboard', self.clinician_client, 'get',
+             reverse('clinician_dashboard') + '?type=Flexion+Low&from=2020-01-01', None),
+            ('view_patient', self.clinician_client, 'get', reverse('view_patient') + '?code=PATIENT1', None),
+            ('rom_test_intro', self.patient_client, 'get', reverse('rom_test_intro'), None),
+            ('rom_test_measure', self.patient_client, 'get', reverse('rom_test_measure', args=['flexion']), None),
+            # Batch and single saves whose risk check writes warnings, then one that doesn't
+            ('save_rom_test_batch', self.patient_client, 'json', reverse('save_rom_test_batch'), {'measurements': batch}),
+            ('save_rom_test', self.patient_client, 'json', reverse('save_rom_test'), low),
+            ('save_rom_test', self.patient_client, 'json', reverse('save_rom_test'), measurement),
+            ('measure_rom_frames', self.patient_client, 'binary', reverse('measure_rom_frames', args=['flexion']),
+             capture),
+            ('rom_history_trend', self.patient_client, 'get', reverse('rom_history_trend'), None),
+            ('rom_history_log', self.patient_client, 'get', reverse('rom_history_log'), None),
+            ('rom_history_log_page', self.patient_client, 'get', reverse('rom_history_log_page'), None),
+            ('rom_series', self.patient_client, 'get', reverse('rom_series'), None),
+            ('rom_series', self.patient_client, 'get', reverse('rom_series') + '?period=month', None),
+            ('rehab_program', self.patient_client, 'get', reverse('rehab_program'), None),
+            ('mark_exercise_complete', self.patient_client, 'post',
+             reverse('mark_exercise_complete', args=[self.exercises[0].id]), {}),
+            ('mark_exercise_complete', self.patient_client, 'post',
+             reverse('mark_exercise_complete', args=[self.exercises[1].id]), {}),
+            # Every exercise done: today's pain feedback goes in
+            ('rehab_program', self.patient_client, 'post', reverse('rehab_program'),
+             {'pain_level': 3, 'feedback': 'Felt fine.'}),
+            ('resolve_warning', self.clinician_client, 'post', reverse('resolve_warning', args=[warning.id]), {}),
+            ('resolve_warnings', self.clinician_client, 'post', reverse('resolve_warnings'),
+             {'warning_ids': list(ROMWarning.objects.filter(user=self.patient).values_list('id', flat=True)[:5])}),
+            ('export_cohort', self.clinician_client, 'get', reverse('export_cohort') + '?table=warnings', None),
+            ('export_rom_pdf', self.patient_client, 'post', reverse('export_rom_pdf'), None),
+            ('report_submit', self.patient_client, 'post', reverse('report_submit'), None),
+            ('report_status', self.patient_client, 'get', reverse('report_status', args=[self.report.id]), None),
+            ('report_download', self.patient_client, 'get', reverse('report_download', args=[self.report.id]), None),
+            ('bulk_report_submit', self.clinician_client, 'post', reverse('bulk_report_submit'),
+             {'codes': 'PATIENT1, OTHER001'}),
+            ('chatbot_cache_stats', self.clinician_client, 'get', reverse('chatbot_cache_stats'), None),
+            ('logout', self.patient_client, 'post', reverse('logout'), None),
+        ]
+
+    def run_view(self, client, method, path, data):
+        # A cold cache is the worst case for the views that read the cached ROM history
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            if method == 'json':
+                response = client.post(path, json.dumps(data), content_type='application/json')
+            elif method == 'binary':
+                response = client.post(path, data, content_type='application/octet-stream')
+            elif method == 'post':
+                response = client.post(path, data or {})
+            else:
+                response = client.get(path)
+        self.assertLess(response.status_code, 400, path)
+        return ctx.captured_queries
+
+    def assert_indexed(self, url_name, queries):
+        with connection.cursor() as cursor:
+            for query in queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                for *_, detail in cursor.fetchall():
+                    match = SCAN_RE.match(detail)
+                    # Walking an index in order and stopping at LIMIT is a bounded read
+                    bounded = 'USING INDEX' in detail and ' LIMIT ' in query['sql']
+                    if match and match.group(1) not in SCAN_ALLOWED_TABLES and not bounded:
+                        self.fail(f"{url_name}: full scan ({detail}) in {query['sql']}")
+                    if 'USE TEMP B-TREE' in detail and 'rom_core_exercise' not in query['sql']:
+                        self.fail(f"{url_name}: unindexed sort ({detail}) in {query['sql']}")
+
+    def test_views_stay_within_query_budget(self):
+        url_names = {pattern.name for pattern in urlpatterns}
+        self.assertEqual({url_name for url_name, *_ in self.requests()}, url_names - UNBUDGETED_VIEWS)
+        self.assertEqual(set(QUERY_BUDGETS), url_names - UNBUDGETED_VIEWS)
+
+        counts = []
+        for url_name, client, method, path, data in self.requests():
+            queries = self.run_view(client, method, path, data)
+            counts.append(len(queries))
+            with self.subTest(url_name, path=path):
+                self.assertLessEqual(len(queries), QUERY_BUDGETS[url_name])
+                self.assert_indexed(url_name, queries)
+
+        # Same views after the patient's history grows: counts must not move
+        self.add_history(self.patient, 40)
+        self.setUp()
+        for (url_name, client, method, path, data), count in zip(self.requests(), counts):
+            queries = self.run_view(client, method, path, data)
+            with self.subTest(url_name, path=path, history='grown'):
+                self.assertLessEqual(len(queries), count, f"{url_name} query count grows with history")
+
+
+class SQLInstrumentationTests(ClinicTestCase):
+    def test_sql_timing_header_and_budget_enforcement(self):
+        response = self.patient_client.get(reverse('rom_series'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+$')
+        with override_settings(SQL_QUERY_BUDGETS={**QUERY_BUDGETS, 'rom_series': 1}):
+            with self.assertRaises(QueryBudgetExceeded), self.assertLogs('rom_core.sql', 'WARNING'):
+                self.patient_client.get(reverse('rom_series'))
+
+
+class CohortExportTests(ClinicTestCase):
+    def test_cohort_export_streams_filtered_rows(self):
+        path = reverse('export_cohort') + '?table=rom_tests&format=ndjson&patient=PATIENT1'
+        self.assertEqual(self.patient_client.get(path).status_code, 403)
+
+        response = self.clinician_client.get(path)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), ROMTest.objects.filter(user=self.patient).count())
+        self.assertEqual({row['patient_code'] for row in rows}, {'PATIENT1'})
+
+        response = self.clinician_client.get(reverse('export_cohort') + '?table=warnings&from=2100-01-01')
+        self.assertEqual(b''.join(response.streaming_content).decode().splitlines(),
+                         ['id,patient_code,date,warning_type,details,resolved,created_at'])
+
+    def test_csv_cells_cannot_start_a_formula(self):
+        texts = ['=HYPERLINK("http://evil.example","x")', '+1+1', '-2+3', '@SUM(A1)', 'Felt stiff - better later']
+        for text in texts:
+            RehabSessionFeedback.objects.create(user=self.patient, date=date.today(), pain_level=3, feedback=text)
+        response = self.clinician_client.get(reverse('export_cohort') + '?table=feedback')
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['feedback'] for row in rows], ["'" + text for text in texts[:4]] + texts[4:])
+
+        # NDJSON isn't opened in spreadsheets; it keeps the text as typed
+        response = self.clinician_client.get(reverse('export_cohort') + '?table=feedback&format=ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['feedback'] for line in lines], texts)
+
+    async def test_asgi_export_streams_without_buffering(self):
+        await self.async_client.aforce_login(self.clinician)
+        response = await self.async_client.get(reverse('export_cohort') + '?table=rom_tests')
+        self.assertTrue(response.is_async)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            body = b''.join([chunk async for chunk in response.streaming_content])
+        # Django warns (and reads the whole iterator into a list) when handed a sync one under ASGI
+        self.assertEqual([str(warning.message) for warning in caught], [])
+        rows = list(csv.DictReader(StringIO(body.decode())))
+        self.assertEqual(len(rows), await ROMTest.objects.acount())
+
+
+class ChatbotTests(ClinicTestCase):
+    @override_settings(CHATBOT_BACKEND='stub', CHATBOT_STUB_DELAY=0)
+    async def test_chatbot_streams_server_sent_events(self):
+        await self.async_client.aforce_login(self.patient)
+        response = await self.async_client.post(
+            reverse('chatbot_ask'), json.dumps({'message': 'Is my flexion improving?'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        events = [event for event in body.split('\n\n') if event]
+        self.assertEqual(events[-1], 'event: done\ndata: {}')
+        text = ''.join(json.loads(event[len('data: '):])['text'] for event in events[:-1])
+        self.assertIn('Is my flexion improving?', text)
+
+    @override_settings(CHATBOT_BACKEND='stub', CHATBOT_STUB_DELAY=0)
+    async def test_chatbot_caches_replies_by_normalized_question(self):
+        await caches['chatbot'].aclear()
+        await self.async_client.aforce_login(self.patient)
+        for message in ('How often should I do pendulum exercises?', '  how OFTEN should i do pendulum exercises  '):
+            response = await self.async_client.post(reverse('chatbot_ask'), json.dumps({'message': message}),
+                                                     content_type='application/json')
+            body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertIn('"cached": true', body)
+        await self.async_client.aforce_login(self.clinician)
+        stats = (await self.async_client.get(reverse('chatbot_cache_stats'))).json()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+
+class RomBatchUploadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('patient', password='pw')
+        self.client.force_login(self.user)
+
+    def upload(self, measurements):
+        return self.client.post(reverse('save_rom_test_batch'), json.dumps({'measurements': measurements}),
+                                content_type='application/json')
+
+    def item(self, client_id, days_ago=1, **values):
+        return {'client_id': client_id, 'timestamp': (timezone.now() - timedelta(days=days_ago)).isoformat(),
+                'flexion': 120, 'extension': 40, 'abduction': 120, 'adduction': 20, **values}
+
+    def test_retries_and_repeated_keys_are_stored_once(self):
+        batch = [self.item('a', 3), self.item('b', 2), self.item('a', 3, flexion=99)]
+        self.assertEqual(self.upload(batch).json(), {'status': 'success', 'created': 2, 'duplicates': 1})
+        # The later copy of a repeated key wins
+        self.assertEqual(ROMTest.objects.get(client_id='a').flexion, 99)
+
+        # A retry after a lost response, plus one new measurement
+        response = self.upload(batch + [self.item('c')])
+        self.assertEqual(response.json(), {'status': 'success', 'created': 1, 'duplicates': 3})
+        self.assertEqual(ROMTest.objects.filter(user=self.user).count(), 3)
+
+    def test_client_timestamp_is_kept(self):
+        item = self.item('a', days_ago=10)
+        self.upload([item])
+        self.assertEqual(ROMTest.objects.get(client_id='a').timestamp.isoformat(), item['timestamp'])
+
+    def test_bad_items_reject_the_whole_batch(self):
+        bad_items = [
+            {'client_id': 'x', 'flexion': 120},
+            self.item('x', timestamp='yesterday'),
+            self.item('x', flexion='wide'),
+            self.item('x', flexion='NaN'),
+            self.item('x', abduction='-Infinity'),
+            self.item('x' * 65),
+        ]
+        for bad in bad_items:
+            with self.subTest(bad=bad):
+                response = self.upload([self.item('ok'), bad])
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['message'], 'Invalid measurement at index 1.')
+        # json.dumps writes float('nan') as a bare NaN literal, which json.loads accepts
+        self.assertEqual(self.upload([self.item('x', extension=float('nan'))]).status_code, 400)
+        self.assertEqual(self.upload({'client_id': 'x'}).status_code, 400)
+        self.assertFalse(ROMTest.objects.exists())
+        self.assertEqual(self.upload([self.item('x' * 64)]).status_code, 200)
+
+    def test_every_day_of_an_offline_batch_is_checked(self):
+        # A low run in the middle of a week offline, then recovery by the newest test
+        flexion = [120, 80, 80, 80, 120, 120]
+        old = [self.item('old', days_ago=30)]
+        self.upload(old)
+        response = self.upload([self.item(f'day-{i}', days_ago=6 - i, flexion=value) for i, value in enumerate(flexion)])
+        self.assertEqual(response.json()['created'], 6)
+        low_day = ROMTest.objects.get(client_id='day-3').timestamp.date()
+        warnings = ROMWarning.objects.filter(user=self.user).values_list('date', 'warning_type', 'details')
+        self.assertEqual(list(warnings), [(low_day, 'Flexion Low', 'Last 3: [80.0, 80.0, 80.0]')])
+        # The same as replaying the tests one save at a time
+        self.assertEqual([row[1:] for row in find_history_warnings([self.user.id])], list(warnings))
+
+    def test_batch_check_reads_only_the_new_tail(self):
+        self.upload([self.item(f'old-{i}', days_ago=40 - i) for i in range(20)])
+        with CaptureQueriesContext(connection) as ctx:
+            check_frozen_shoulder_risk(self.user, since=timezone.now() - timedelta(days=25))
+        selects = [query['sql'] for query in ctx.captured_queries if query['sql'].startswith('SELECT')]
+        # The two tests before the tail, then the tail itself
+        self.assertEqual(len(selects), 2)
+        self.assertIn('LIMIT 2', selects[0])
+
+
+HEALTHY = {'flexion': 150.0, 'extension': 50.0, 'abduction': 150.0, 'adduction': 25.0}
+
+
+def original_risk_warnings(tests):
+    """The five checks check_frozen_shoulder_risk had before risk.RISK_RULES, on newest-first dicts."""
+    if len(tests) < 3:
+        return set()
+    found = set()
+    for warning_type, field, threshold in (('Flexion Low', 'flexion', 90), ('Extension Low', 'extension', 30),
+                                           ('Abduction Low', 'abduction', 90), ('Adduction Low', 'adduction', 10)):
+        values = [test[field] for test in tests[:3]]
+        if all(v < threshold for v in values):
+            found.add((warning_type, f"Last 3: {values}"))
+    this_abd, prev_abd_avg = tests[0]['abduction'], (tests[1]['abduction'] + tests[2]['abduction']) / 2
+    if prev_abd_avg > 0 and this_abd < 0.5 * prev_abd_avg:
+        found.add(('Abduction Dropped >50%', f"Today: {this_abd:.1f}, Prev avg: {prev_abd_avg:.1f}"))
+    return found
+
+
+class RiskRuleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def save_tests(self, user, tests, start=None):
+        """Save oldest-first value dicts one at a time, running the risk check after each like save_rom_test."""
+        start = start or timezone.now() - timedelta(days=len(tests))
+        for i, values in enumerate(tests):
+            ROMTest.objects.create(user=user, timestamp=start + timedelta(hours=12 * i), **values)
+            check_frozen_shoulder_risk(user)
+
+    def test_rules_match_the_original_checks_at_their_boundaries(self):
+        cases = [[HEALTHY] * 2]
+        for field, threshold in (('flexion', 90), ('extension', 30), ('abduction', 90), ('adduction', 10)):
+            cases += [
+                [{**HEALTHY, field: threshold - 0.1}] * 3,
+                [{**HEALTHY, field: threshold}] * 3,
+                [{**HEALTHY, field: threshold - 0.1}] * 2 + [{**HEALTHY, field: threshold}],
+                [{**HEALTHY, field: threshold}] + [{**HEALTHY, field: threshold - 0.1}] * 2,
+                [{**HEALTHY, field: threshold - 0.1}] * 2,
+            ]
+        # Newest abduction against half the mean of the two before it
+        # (values are floats, as the original read them back from the FloatFields)
+        for newest, older in ((49.9, (100.0, 100.0)), (50.0, (100.0, 100.0)), (59.9, (80.0, 160.0)),
+                              (60.0, (80.0, 160.0)), (0.0, (0.0, 0.0)), (10.0, (0.0, 0.0))):
+            cases.append([{**HEALTHY, 'abduction': older[0]}, {**HEALTHY, 'abduction': older[1]},
+                          {**HEALTHY, 'abduction': newest}])
+
+        for i, tests in enumerate(cases):
+            with self.subTest(tests=tests):
+                user = User.objects.create_user(f'patient{i}')
+                self.save_tests(user, tests)
+                saved = set(ROMWarning.objects.filter(user=user).values_list('warning_type', 'details'))
+                self.assertEqual(saved, original_risk_warnings(tests[::-1]))
+
+        # Every rule fires somewhere in the cases above
+        self.assertEqual(set(ROMWarning.objects.values_list('warning_type', flat=True)),
+                         {rule.warning_type for rule in RISK_RULES})
+
+    def history(self, count, seed=0):
+        # Ranges straddle every threshold; two tests a day on some days
+        rng = np.random.default_rng(seed)
+        return [
+            {'flexion': rng.uniform(60, 130), 'extension': rng.uniform(15, 45),
+             'abduction': rng.uniform(30, 150), 'adduction': rng.uniform(0, 25)}
+            for _ in range(count)
+        ]
+
+    def test_history_replay_matches_saving_test_by_test(self):
+        users = [User.objects.create_user(f'patient{i}') for i in range(3)]
+        for i, user in enumerate(users):
+            self.save_tests(user, self.history(40, seed=i))
+        saved = set(ROMWarning.objects.values_list('user_id', 'date', 'warning_type'))
+        self.assertGreater(len(saved), 20)
+
+        replayed = find_history_warnings([user.id for user in users])
+        self.assertEqual({(user_id, day, warning_type) for user_id, day, warning_type, _ in replayed}, saved)
+        self.assertEqual(len(replayed), len(saved))
+
+    def test_backfill_command_is_idempotent_and_honours_dry_run(self):
+        start = timezone.now() - timedelta(days=30)
+        for i in range(3):
+            user = User.objects.create_user(f'patient{i}')
+            # bulk_create sends no signals, so no warnings yet
+            ROMTest.objects.bulk_create([
+                ROMTest(user=user, timestamp=start + timedelta(hours=12 * j), **values)
+                for j, values in enumerate(self.history(30, seed=i))
+            ])
+        expected = find_history_warnings(list(User.objects.values_list('id', flat=True)))
+
+        out = StringIO()
+        call_command('backfill_rom_warnings', workers=1, chunk_size=2, dry_run=True, stdout=out)
+        self.assertIn(f"Would create {len(expected)} warnings.", out.getvalue())
+        self.assertFalse(ROMWarning.objects.exists())
+
+        call_command('backfill_rom_warnings', workers=1, chunk_size=2, stdout=out)
+        self.assertEqual(set(ROMWarning.objects.values_list('user_id', 'date', 'warning_type', 'details')),
+                         set(expected))
+
+        out = StringIO()
+        call_command('backfill_rom_warnings', workers=1, chunk_size=2, stdout=out)
+        self.assertIn("Created 0 warnings.", out.getvalue())
+        self.assertEqual(ROMWarning.objects.count(), len(expected))
+
+
+class RiskCheckTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('patient')
+        self.start = timezone.now() - timedelta(days=10)
+
+    def save(self, hours, flexion=150.0, check=True):
+        test = ROMTest.objects.create(user=self.user, timestamp=self.start + timedelta(hours=hours),
+                                      **{**HEALTHY, 'flexion': flexion})
+        if check:
+            check_frozen_shoulder_risk(self.user)
+        return test
+
+    def flexion_low(self):
+        return ROMWarning.objects.filter(user=self.user, warning_type='Flexion Low').exists()
+
+    def test_check_reads_only_the_newest_window(self):
+        for hours in range(5):
+            self.save(hours, flexion=80, check=False)
+        with CaptureQueriesContext(connection) as ctx:
+            check_frozen_shoulder_risk(self.user)
+        self.assertEqual([query['sql'].split()[0] for query in ctx.captured_queries], ['SELECT', 'INSERT'])
+        self.assertIn('LIMIT 3', ctx.captured_queries[0]['sql'])
+
+    def test_back_dated_and_unsignalled_tests_are_seen(self):
+        for hours in range(3):
+            self.save(hours)
+        self.save(10, flexion=80)
+        self.save(5, flexion=80)  # back-dated: the window is now 10h, 5h, 2h
+        self.assertFalse(self.flexion_low())
+        ROMTest.objects.bulk_create([ROMTest(user=self.user, timestamp=self.start + timedelta(hours=7),
+                                             **{**HEALTHY, 'flexion': 80})])
+        check_frozen_shoulder_risk(self.user)  # newest three: 10h, 7h, 5h
+        self.assertTrue(self.flexion_low())
+
+    def test_warnings_are_upserted_in_one_insert(self):
+        for hours in range(3):
+            self.save(hours, flexion=80, check=False)
+        ROMTest.objects.filter(user=self.user).update(abduction=80, adduction=5)
+        with CaptureQueriesContext(connection) as ctx:
+            check_frozen_shoulder_risk(self.user)
+        inserts = [query for query in ctx.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ROMWarning.objects.filter(user=self.user).count(), 3)
+
+        # A later test the same day refreshes the details instead of adding a row
+        self.save(4, flexion=70)
+        self.assertEqual(ROMWarning.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(ROMWarning.objects.get(user=self.user, warning_type='Flexion Low').details,
+                         'Last 3: [70.0, 80.0, 80.0]')
+
+
+class DailyAdherenceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('patient')
+        self.exercises = [Exercise.objects.create(name=f'Exercise {i}', description='...') for i in range(3)]
+        self.today = date.today()
+        self.days = [self.today - timedelta(days=i) for i in range(4, -1, -1)]
+        for day in self.days:
+            schedule = RehabSchedule.objects.create(user=self.user, date=day)
+            schedule.exercises.set(self.exercises[:2])
+            for exercise in self.exercises[:2]:
+                ExerciseCompletion.objects.create(user=self.user, exercise=exercise, date=day)
+
+    def streaks(self):
+        return list(DailyAdherence.objects.filter(user=self.user).order_by('date').values_list('streak', flat=True))
+
+    def rows(self):
+        return list(DailyAdherence.objects.filter(user=self.user).order_by('date')
+                    .values_list('date', 'assigned', 'completed', 'fully_done', 'streak'))
+
+    def assert_matches_rebuild(self):
+        refreshed = self.rows()
+        rebuild_daily_adherence(self.user.id, self.today)
+        self.assertEqual(refreshed, self.rows())
+
+    def test_deleting_a_completion_rechains_later_streaks(self):
+        self.assertEqual(self.streaks(), [1, 2, 3, 4, 5])
+        ExerciseCompletion.objects.filter(user=self.user, date=self.days[2]).first().delete()
+        self.assertEqual(self.streaks(), [1, 2, 0, 1, 2])
+        self.assert_matches_rebuild()
+        ExerciseCompletion.objects.create(user=self.user, exercise=self.exercises[0], date=self.days[2])
+        self.assertEqual(self.streaks(), [1, 2, 3, 4, 5])
+
+    def test_schedule_edits_rechain_later_streaks(self):
+        schedule = RehabSchedule.objects.get(user=self.user, date=self.days[1])
+        schedule.exercises.add(self.exercises[2])
+        self.assertEqual(self.streaks(), [1, 0, 1, 2, 3])
+        self.assert_matches_rebuild()
+        schedule.exercises.remove(self.exercises[2])
+        self.assertEqual(self.streaks(), [1, 2, 3, 4, 5])
+        schedule.delete()  # falls back to the whole catalogue, which has a third exercise
+        self.assertEqual(self.streaks(), [1, 0, 1, 2, 3])
+        self.assert_matches_rebuild()
+
+    def test_only_clinicians_see_a_patients_adherence(self):
+        UserProfile.objects.create(user=self.user, role='patient', unique_code='PATIENT1')
+        path = reverse('view_patient') + '?code=PATIENT1'
+        other = User.objects.create_user('other')
+        UserProfile.objects.create(user=other, role='patient', unique_code='OTHER001')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(path).status_code, 403)
+
+        clinician = User.objects.create_user('clinician')
+        UserProfile.objects.create(user=clinician, role='clinician')
+        self.client.force_login(clinician)
+        response = self.client.get(path)
+        self.assertEqual([day.streak for day in response.context['adherence']], [5, 4, 3, 2, 1])
+
+    def test_migration_backfill_matches_rebuild(self):
+        expected = self.rows()
+        DailyAdherence.objects.all().delete()
+        import_module('rom_core.migrations.0010_dailyadherence').backfill_daily_adherence(apps, None)
+        self.assertEqual(self.rows(), expected)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('patient')
+        monday = datetime.fromisoformat('2026-03-30T12:00:00+00:00')
+        # Sun 29 Mar, then Mon 30, Tue 31 Mar and Thu 2 Apr: one ISO week across two months
+        self.stamps = [monday - timedelta(days=1), monday, monday + timedelta(days=1), monday + timedelta(days=3)]
+        for i, stamp in enumerate(self.stamps):
+            ROMTest.objects.create(user=self.user, timestamp=stamp, flexion=100 + 10 * i, extension=40,
+                                   abduction=120, adduction=20 + i)
+
+    def rows(self, user=None):
+        return {
+            (row.period, row.period_start): (row.count, *(round(getattr(row, field), 6) for field in STAT_FIELDS))
+            for row in ROMRollup.objects.filter(user=user or self.user)
+        }
+
+    def week(self, start=date(2026, 3, 30)):
+        return ROMRollup.objects.get(user=self.user, period=ROMRollup.WEEK, period_start=start)
+
+    def assert_matches_rebuild(self):
+        stored = self.rows()
+        rebuild_rollups(self.user.id)
+        self.assertEqual(stored, self.rows())
+
+    def test_new_tests_fold_into_their_week_and_month(self):
+        week = self.week()
+        self.assertEqual((week.count, week.flexion_min, week.flexion_max, week.mean('flexion')), (3, 110, 130, 120))
+        months = ROMRollup.objects.filter(user=self.user, period=ROMRollup.MONTH).order_by('period_start')
+        self.assertEqual([(row.period_start, row.count) for row in months], [(date(2026, 3, 1), 3), (date(2026, 4, 1), 1)])
+        self.assert_matches_rebuild()
+
+    @override_settings(TIME_ZONE='Australia/Sydney')
+    def test_buckets_follow_the_local_day(self):
+        user = User.objects.create_user('sydney')
+        # Sunday evening in UTC is Monday morning in Sydney
+        ROMTest.objects.create(user=user, timestamp=datetime.fromisoformat('2026-04-05T20:00:00+00:00'),
+                               flexion=100, extension=40, abduction=120, adduction=20)
+        stored = self.rows(user)
+        self.assertIn(('week', date(2026, 4, 6)), stored)
+        rebuild_rollups(user.id)
+        self.assertEqual(self.rows(user), stored)
+
+    def test_edits_and_deletes_recompute_their_buckets(self):
+        test = ROMTest.objects.get(user=self.user, timestamp=self.stamps[3])
+        test.timestamp -= timedelta(days=14)  # moves April's only test back into March
+        test.save()
+        self.assertFalse(ROMRollup.objects.filter(user=self.user, period_start=date(2026, 4, 1)).exists())
+        self.assertEqual(self.week().count, 2)
+        self.assert_matches_rebuild()
+
+        ROMTest.objects.get(user=self.user, timestamp=self.stamps[1]).delete()
+        week = self.week()
+        self.assertEqual((week.count, week.flexion_min, week.flexion_max), (1, 120, 120))
+        self.assert_matches_rebuild()
+
+    def test_refresh_picks_up_bulk_inserts(self):
+        rows = ROMTest.objects.bulk_create([
+            ROMTest(user=self.user, timestamp=self.stamps[1] + timedelta(hours=hours),
+                    flexion=90, extension=40, abduction=120, adduction=20)
+            for hours in (1, 2)
+        ])
+        self.assertEqual(self.week().count, 3)  # bulk_create sends no post_save
+        refresh_rollups(self.user.id, [row.timestamp for row in rows])
+        week = self.week()
+        self.assertEqual((week.count, week.flexion_min), (5, 90))
+        self.assert_matches_rebuild()
+
+    def test_migration_backfill_covers_existing_tests(self):
+        expected = self.rows()
+        ROMRollup.objects.all().delete()
+        import_module('rom_core.migrations.0015_romrollup').backfill_rom_rollups(apps, None)
+        self.assertEqual(self.rows(), expected)
+
+        # So the next save adds to the week instead of starting it at count 1
+        ROMTest.objects.create(user=self.user, timestamp=self.stamps[2] + timedelta(hours=1),
+                               flexion=100, extension=40, abduction=120, adduction=20)
+        self.assertEqual(self.week().count, 4)
+        self.assert_matches_rebuild()
+
+    def test_rollup_series_columns_and_range(self):
+        data = rollup_series(self.user, ROMRollup.WEEK)
+        self.assertEqual(data['t'], [int(datetime.fromisoformat(f'2026-03-{day}T00:00:00+00:00').timestamp())
+                                     for day in (23, 30)])
+        self.assertEqual(data['count'], [1, 3])
+        self.assertEqual((data['flexion'], data['flexion_min'], data['flexion_max']), ([100, 120], [100, 110], [100, 130]))
+        self.assertEqual(data['adduction'], [20, 22])
+
+        # start snaps back to its period's first day; end is inclusive
+        self.assertEqual(rollup_series(self.user, ROMRollup.MONTH, start=date(2026, 4, 15))['count'], [1])
+        self.assertEqual(rollup_series(self.user, ROMRollup.MONTH, end=date(2026, 3, 31))['count'], [3])
+        self.assertEqual(rollup_series(self.user, ROMRollup.WEEK, start=date(2026, 4, 1))['count'], [3])
+
+
+class DownsampleTests(TestCase):
+    def test_lttb_keeps_ends_and_peaks_within_threshold(self):
+        rng = np.random.default_rng(0)
+        x = np.sort(rng.uniform(0, 1000, 5000))
+        y = 100 + rng.normal(0, 2, len(x))
+        y[1234], y[4000] = 170, 20  # one spike, one dip
+        keep = lttb_indices(x, y, 300)
+        self.assertEqual(len(keep), 300)
+        self.assertTrue((np.diff(keep) > 0).all())
+        self.assertEqual((keep[0], keep[-1]), (0, len(x) - 1))
+        self.assertIn(1234, keep)
+        self.assertIn(4000, keep)
+
+    def test_lttb_keeps_every_point_when_under_threshold(self):
+        x = np.arange(50.0)
+        for threshold in (50, 300):
+            np.testing.assert_array_equal(lttb_indices(x, np.sin(x), threshold), np.arange(50))
+
+    def test_columns_share_at_most_threshold_rows(self):
+        rng = np.random.default_rng(1)
+        x = np.arange(5000.0)
+        columns = {field: rng.normal(100, 5, len(x)) for field in ROM_FIELDS}
+        for i, values in enumerate(columns.values()):
+            values[1000 + 700 * i] = 170  # each column's own peak
+        keep = downsample_columns(x, columns, 300)
+        self.assertLessEqual(len(keep), 300)
+        for i in range(len(columns)):
+            self.assertIn(1000 + 700 * i, keep)
+        np.testing.assert_array_equal(downsample_columns(x[:300], columns, 300), np.arange(300))
+
+
+class RomSeriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('patient')
+        self.client.force_login(self.user)
+        rng = np.random.default_rng(0)
+        start = timezone.now() - timedelta(days=1000)
+        ROMTest.objects.bulk_create([
+            ROMTest(user=self.user, timestamp=start + timedelta(hours=12 * i),
+                    **{field: float(value) for field, value in zip(ROM_FIELDS, rng.normal(100, 20, 4))})
+            for i in range(2000)
+        ])
+
+    def test_series_is_capped_and_zoomed_windows_are_full_resolution(self):
+        data = self.client.get(reverse('rom_series')).json()
+        self.assertLessEqual(len(data['t']), CHART_MAX_POINTS)
+        self.assertEqual({len(data[field]) for field in ROM_FIELDS}, {len(data['t'])})
+
+        end = timezone.localdate()
+        data = self.client.get(reverse('rom_series'), {'start': end - timedelta(days=30), 'end': end}).json()
+        self.assertEqual(len(data['t']), ROMTest.objects.filter(timestamp__date__gte=end - timedelta(days=30)).count())
+
+    def test_unchanged_history_revalidates_with_304(self):
+        etag = self.client.get(reverse('rom_series'))['ETag']
+        response = self.client.get(reverse('rom_series'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        ROMTest.objects.create(user=self.user, flexion=90, extension=40, abduction=90, adduction=20)
+        response = self.client.get(reverse('rom_series'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class RomHistoryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('patient')
+        self.client.force_login(self.user)
+        self.test = ROMTest.objects.create(user=self.user, timestamp=timezone.now() - timedelta(days=1),
+                                           flexion=100, extension=40, abduction=100, adduction=20)
+
+    def cached(self):
+        return cache.get(f"rom-history:{self.user.pk}")
+
+    def warm(self):
+        self.client.get(reverse('rom_history_trend'))
+        self.assertIsNotNone(self.cached())
+
+    def test_repeat_trend_view_reads_no_rom_tests(self):
+        self.warm()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(reverse('rom_history_trend')).status_code, 200)
+        self.assertFalse([query for query in ctx.captured_queries if 'rom_core_romtest' in query['sql']])
+
+    def test_dashboard_reads_only_the_log_page(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(reverse('patient_dashboard')).status_code, 200)
+        # The log and the summary arrows both come from one indexed LIMIT query
+        queries = [query['sql'] for query in ctx.captured_queries if 'rom_core_romtest' in query['sql']]
+        self.assertEqual(len(queries), 1)
+        self.assertIn(f'LIMIT {ROM_LOG_PAGE_SIZE + 1}', queries[0])
+
+    def test_save_admin_edit_and_delete_drop_the_cached_history(self):
+        self.warm()
+        self.client.post(reverse('save_rom_test'), json.dumps(HEALTHY), content_type='application/json')
+        self.assertIsNone(self.cached())
+
+        self.warm()
+        admin_user = User.objects.create_superuser('admin', password='pw')
+        admin = Client()
+        admin.force_login(admin_user)
+        local = timezone.localtime(self.test.timestamp)
+        response = admin.post(reverse('admin:rom_core_romtest_change', args=[self.test.pk]), {
+            'user': self.user.pk, 'timestamp_0': local.strftime('%Y-%m-%d'), 'timestamp_1': local.strftime('%H:%M:%S'),
+            'flexion': 80, 'extension': 40, 'abduction': 100, 'adduction': 20, 'client_id': '',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertIsNone(self.cached())
+        self.warm()
+        self.assertEqual(self.cached()['flexion'][0], 80)
+
+        self.test.delete()
+        self.assertIsNone(self.cached())
+
+    def test_writes_from_other_processes_change_the_etag(self):
+        self.warm()
+        etag = self.client.get(reverse('rom_series'))['ETag']
+        # A write whose signals ran elsewhere, as another worker's would: the cache still holds the old history
+        ROMTest.objects.bulk_create([ROMTest(user=self.user, flexion=90, extension=40, abduction=90, adduction=20)])
+        self.assertIsNotNone(self.cached())
+        response = self.client.get(reverse('rom_series'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['flexion'], [100, 90])
+
+
+class ClinicianInboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.clinician = User.objects.create_user('clinician')
+        UserProfile.objects.create(user=cls.clinician, role='clinician')
+        cls.patient = User.objects.create_user('patient')
+        UserProfile.objects.create(user=cls.patient, role='patient', unique_code='PATIENT1')
+        start = date(2025, 1, 1)
+        ROMWarning.objects.bulk_create([
+            ROMWarning(user=cls.patient, date=start + timedelta(days=i // 2),
+                       warning_type=RISK_RULES[i % 2].warning_type, resolved=i % 7 == 0)
+            for i in range(130)
+        ])
+        # Runs of warnings created in the same instant, so pages split ties on id
+        created = timezone.now()
+        for i, pk in enumerate(ROMWarning.objects.order_by('id').values_list('id', flat=True)):
+            ROMWarning.objects.filter(id=pk).update(created_at=created - timedelta(minutes=i // 5))
+
+    def setUp(self):
+        self.client.force_login(self.clinician)
+
+    def walk(self, **filters):
+        ids, cursor = [], None
+        while True:
+            params = {**filters, 'cursor': cursor} if cursor else filters
+            response = self.client.get(reverse('clinician_dashboard'), params)
+            self.assertEqual(response.status_code, 200)
+            ids += [warning.id for warning in response.context['active_warnings']]
+            cursor = response.context['next_cursor']
+            if cursor is None:
+                return ids
+
+    def expected(self, **lookups):
+        return list(ROMWarning.objects.filter(resolved=False, **lookups).order_by('-created_at', '-id')
+                    .values_list('id', flat=True))
+
+    def test_walking_the_cursor_returns_every_open_warning_once(self):
+        self.assertEqual(self.walk(), self.expected())
+        self.assertGreater(len(self.expected()), 2 * WARNING_PAGE_SIZE)
+
+    def test_type_and_date_filters(self):
+        warning_type = RISK_RULES[1].warning_type
+        self.assertEqual(self.walk(type=warning_type), self.expected(warning_type=warning_type))
+        self.assertEqual(self.walk(**{'from': '2025-01-10', 'to': '2025-01-20'}),
+                         self.expected(date__range=(date(2025, 1, 10), date(2025, 1, 20))))
+        self.assertEqual(self.walk(type=warning_type, **{'from': '2025-02-01'}),
+                         self.expected(warning_type=warning_type, date__gte=date(2025, 2, 1)))
+
+    def test_tampered_cursor_is_rejected(self):
+        for cursor in ('not-a-cursor', base64.urlsafe_b64encode(b'yesterday|7').decode(),
+                       base64.urlsafe_b64encode(b'2025-01-01T00:00:00+00:00|x').decode()):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('clinician_dashboard'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+
+    def test_patients_are_forbidden(self):
+        self.client.force_login(self.patient)
+        warning = ROMWarning.objects.filter(resolved=False).first()
+        self.assertEqual(self.client.get(reverse('clinician_dashboard')).status_code, 403)
+        self.assertEqual(self.client.post(reverse('resolve_warning', args=[warning.id])).status_code, 403)
+        self.assertEqual(self.client.post(reverse('resolve_warnings'), {'warning_ids': [warning.id]}).status_code, 403)
+        self.assertFalse(ROMWarning.objects.get(id=warning.id).resolved)
+
+    def test_bulk_resolve_is_one_update(self):
+        ids = self.expected()[:20]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('resolve_warnings'),
+                                        {'warning_ids': ids + ['junk'], 'next': '/clinician/?type=x'})
+        self.assertRedirects(response, '/clinician/?type=x', fetch_redirect_response=False)
+        updates = [query for query in ctx.captured_queries if query['sql'].startswith('UPDATE "rom_core_romwarning"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(set(ROMWarning.objects.filter(id__in=ids).values_list('resolved', flat=True)), {True})
+        self.assertEqual(self.walk(), self.expected())
+        self.assertNotIn(ids[0], self.walk())
+
+        response = self.client.post(reverse('resolve_warnings'), {'warning_ids': [], 'next': '//evil.example/'})
+        self.assertRedirects(response, reverse('clinician_dashboard'), fetch_redirect_response=False)
+
+
+class RomHistoryLogTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('patient')
+        self.client.force_login(self.user)
+        # Batches of five tests share a timestamp (kiosk uploads); flexion identifies each test
+        start = timezone.now() - timedelta(days=60)
+        ROMTest.objects.bulk_create([
+            ROMTest(user=self.user, timestamp=start + timedelta(hours=i // 5), flexion=i, extension=40,
+                    abduction=120, adduction=20)
+            for i in range(173)
+        ])
+
+    def test_pages_cover_tied_timestamps_once_in_order(self):
+        response = self.client.get(reverse('rom_history_log'))
+        flexion = [test['flexion'] for test in response.context['rom_tests']]
+        cursor = response.context['next_cursor']
+        while cursor:
+            page = self.client.get(reverse('rom_history_log_page'), {'cursor': cursor}).json()
+            flexion += [test['flexion'] for test in page['tests']]
+            cursor = page['next_cursor']
+        expected = ROMTest.objects.filter(user=self.user).order_by('-timestamp', '-id').values_list('flexion', flat=True)
+        self.assertEqual(flexion, list(expected))
+
+    def test_bad_cursor_is_rejected(self):
+        for cursor in ('%%%', base64.urlsafe_b64encode(b'2025-01-01T00:00:00|').decode()):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('rom_history_log_page'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['message'], 'Invalid cursor.')
+
+    def test_dashboard_renders_only_the_first_page(self):
+        response = self.client.get(reverse('patient_dashboard'))
+        self.assertEqual(len(response.context['rom_tests']), ROM_LOG_PAGE_SIZE)
+        self.assertContains(response, f'data-cursor="{response.context["next_cursor"]}"')
+        # The page's header row plus one row per test, however long the history
+        self.assertEqual(response.content.count(b'<tr'), ROM_LOG_PAGE_SIZE + 1)
+
+
+def run_worker():
+    """One pass of the report worker, in this process so it sees the test database."""
+    out = StringIO()
+    call_command('run_report_worker', workers=1, once=True, stdout=out, stderr=out)
+    return out.getvalue()
+
+
+class ReportJobTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('patient')
+        self.client.force_login(self.user)
+        for i in range(5):
+            ROMTest.objects.create(user=self.user, timestamp=timezone.now() - timedelta(days=30 - 7 * i), **HEALTHY)
+
+    def test_worker_builds_a_submitted_report(self):
+        job = self.client.post(reverse('report_submit')).json()
+        self.assertEqual(job['status'], ReportJob.PENDING)
+        self.assertEqual(self.client.post(reverse('report_submit')).json()['job_id'], job['job_id'])
+
+        self.assertIn("Built 1 reports (0 failed).", run_worker())
+        status = self.client.get(job['status_url']).json()
+        self.assertEqual(status['status'], ReportJob.DONE)
+        response = self.client.get(status['download_url'])
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+        # The ready report is served straight away; GET never queues one
+        response = self.client.post(reverse('export_rom_pdf'))
+        self.assertEqual((response.status_code, response.content), (200, bytes(ReportJob.objects.get().pdf)))
+        self.assertEqual(self.client.get(reverse('export_rom_pdf')).status_code, 405)
+        self.assertEqual(ReportJob.objects.count(), 1)
+
+    def test_expired_reports_are_deleted(self):
+        job_id = self.client.post(reverse('report_submit')).json()['job_id']
+        run_worker()
+        ReportJob.objects.filter(id=job_id).update(expires_at=timezone.now() - timedelta(minutes=1))
+        run_worker()
+        self.assertFalse(ReportJob.objects.filter(id=job_id).exists())
+        self.assertEqual(self.client.get(reverse('report_status', args=[job_id])).status_code, 404)
+        self.assertNotEqual(self.client.post(reverse('report_submit')).json()['job_id'], job_id)
+
+    def test_stale_running_jobs_are_requeued(self):
+        stale, fresh = (
+            ReportJob.objects.create(user=self.user, history_version='v', status=ReportJob.RUNNING,
+                                     started_at=timezone.now() - age)
+            for age in (STALE_JOB_AFTER + timedelta(minutes=1), timedelta(minutes=1))
+        )
+        run_worker()
+        self.assertEqual(ReportJob.objects.get(id=stale.id).status, ReportJob.DONE)
+        self.assertEqual(ReportJob.objects.get(id=fresh.id).status, ReportJob.RUNNING)
+
+    def test_job_key_follows_writes_the_cache_missed(self):
+        job_id = self.client.post(reverse('report_submit')).json()['job_id']
+        get_rom_history(self.user)  # warm this process's cache
+        # A test saved by another server process: its signals ran there
+        ROMTest.objects.bulk_create([ROMTest(user=self.user, **HEALTHY)])
+        self.assertNotEqual(self.client.post(reverse('report_submit')).json()['job_id'], job_id)
+
+    def test_a_job_is_claimed_once(self):
+        job = ReportJob.objects.create(user=self.user, history_version='v')
+        self.assertEqual(claim_jobs(5), [job.id])
+        self.assertEqual(claim_jobs(5), [])
+
+
+class BulkReportTests(ClinicTestCase):
+    def test_worker_zips_one_pdf_per_patient(self):
+        gone = User.objects.create_user('gone')
+        UserProfile.objects.create(user=gone, role='patient', unique_code='GONE0001')
+        response = self.clinician_client.post(reverse('bulk_report_submit'),
+                                              {'codes': 'PATIENT1, OTHER001\nGONE0001 PATIENT1'})
+        self.assertEqual(response.status_code, 202)
+        job = ReportJob.objects.get(id=response.json()['job_id'])
+        self.assertEqual(job.patients, [self.patient.id, User.objects.get(username='other').id, gone.id])
+
+        # A patient deleted while the job waits fails alone; the rest still get a report
+        gone_id = gone.id
+        gone.delete()
+        self.assertIn("Built 1 reports (0 failed).", run_worker())
+        response = self.clinician_client.get(reverse('report_download', args=[job.id]))
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(BytesIO(response.content)) as archive:
+            self.assertEqual(sorted(archive.namelist()), ['OTHER001_other.pdf', 'PATIENT1_patient.pdf', 'errors.txt'])
+            self.assertTrue(archive.read('PATIENT1_patient.pdf').startswith(b'%PDF'))
+            errors = archive.read('errors.txt').decode()
+        self.assertEqual(errors, f"{gone_id}: DoesNotExist: User matching query does not exist.\n")
+
+    def test_unknown_codes_are_rejected(self):
+        response = self.clinician_client.post(reverse('bulk_report_submit'), {'codes': 'PATIENT1 NOPE0001 nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Unknown patient codes: NOPE0001, nope')
+        self.assertFalse(ReportJob.objects.filter(user=self.clinician).exists())
+        self.assertEqual(self.patient_client.post(reverse('bulk_report_submit'), {'codes': 'PATIENT1'}).status_code, 403)
+
+
+class StartupImportTests(TestCase):
+    def test_heavy_dependencies_load_lazily(self):
+        # benchmarks/startup.py exits non-zero if chat/PDF libraries load at startup
+        result = subprocess.run(
+            [sys.executable, str(settings.BASE_DIR / 'benchmarks' / 'startup.py'), '--runs', '1'],
+            capture_output=True, text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+
+
+class PoseEngineTests(TestCase):
+    def capture(self, angle, frames=60):
+        # Arms held at `angle` degrees, seen from the front; left side barely visible
+        return arm_frames(np.full(frames, angle), hidden_side='left')
+
+    def test_held_angle_ignores_spikes_and_picks_visible_side(self):
+        frames = self.capture(120)
+        frames[30, 14, :2] = 0.4, 0.2  # one frame of the elbow jumping overhead
+        result = measure_capture(frames)
+        self.assertEqual((result.angle, result.side), (120.0, 'right'))
+
+    def test_short_capture_has_no_angle(self):
+        self.assertIsNone(measure_capture(self.capture(90, frames=10)).angle)
+        self.assertEqual(measure_rom({'flexion': self.capture(45)})['flexion'].angle, 45.0)
+
+    def test_coincident_landmarks_carry_no_weight(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')  # no divide-by-zero RuntimeWarning either
+            blank = np.zeros((60, LANDMARK_COUNT, 4))
+            blank[..., 3] = 1.0  # all landmarks "visible" at the same point
+            self.assertEqual(measure_capture(blank), (None, 'left', 0.0, 0))
+
+            frames = self.capture(120)
+            frames[20:50, [12, 14], :2] = frames[20:50, [24], :2]  # right shoulder and elbow on the hip
+            result = measure_capture(frames)
+        self.assertEqual((result.angle, result.side, result.frames), (120.0, 'right', 30))
+
+    def test_noisy_sweep_within_two_degrees(self):
+        for target in (60, 150):
+            frames = arm_frames(sweep([target]), 'side', noise=0.003, dropout=0.05, hidden_side='left', seed=target)
+            self.assertAlmostEqual(measure_capture(frames).angle, target, delta=2)
+
+    def test_binary_capture_upload(self):
+        self.client.force_login(User.objects.create_user('patient', password='pw'))
+        path = reverse('measure_rom_frames', args=['flexion'])
+        body = encode_frames(self.capture(120)[:, ROM_LANDMARKS], np.arange(60) * 33.3)
+        response = self.client.post(path, body, content_type='application/octet-stream')
+        self.assertEqual((response.json()['angle'], response.json()['side']), (120.0, 'right'))
+        self.assertEqual(self.client.post(path, body[:-4], content_type='application/octet-stream').status_code, 400)
+
+    def test_non_finite_capture_values_are_rejected(self):
+        self.client.force_login(User.objects.create_user('patient', password='pw'))
+        path = reverse('measure_rom_frames', args=['flexion'])
+        timestamps = np.arange(60) * 33.3
+        for name, where, value in (('visibility', (10, 2, 3), np.inf), ('x', (0, 0, 0), np.nan),
+                                   ('timestamp', 5, -np.inf)):
+            with self.subTest(name):
+                frames = self.capture(120)[:, ROM_LANDMARKS]
+                stamps = timestamps.copy()
+                if name == 'timestamp':
+                    stamps[where] = value
+                else:
+                    frames[where] = value
+                response = self.client.post(path, encode_frames(frames, stamps), content_type='application/octet-stream')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['message'], "Timestamps and landmark values must be finite.")
+
+    async def test_live_channel_reports_steady_hold(self):
+        user = await sync_to_async(User.objects.create_user)('patient', password='pw')
+        await self.async_client.aforce_login(user)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={self.async_client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        live = ApplicationCommunicator(application, {
+            'type': 'websocket', 'path': LIVE_PATH, 'headers': [(b'cookie', cookie.encode())],
+        })
+        await live.send_input({'type': 'websocket.connect'})
+        self.assertEqual(await live.receive_output(), {'type': 'websocket.accept'})
+        for frame in self.capture(120, frames=20)[:, ROM_LANDMARKS]:
+            await live.send_input({'type': 'websocket.receive', 'bytes': encode_frames([frame], [0])})
+            reading = json.loads((await live.receive_output())['text'])
+        self.assertEqual(reading, {'angle': 120.0, 'side': 'right', 'steady': True, 'dropped': 0})
+        await live.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await live.wait()
+
+
+class SeedCohortTests(TestCase):
+    def test_seed_cohort_builds_history_and_derived_rows(self):
+        call_command('seed_cohort', patients=3, clinicians=1, years=0.5, stdout=StringIO())
+        patients = UserProfile.objects.filter(role='patient', user__username__startswith='seed-')
+        self.assertEqual(patients.count(), 3)
+        self.assertEqual(len({profile.unique_code for profile in patients}), 3)
+        self.assertGreater(ROMTest.objects.filter(user__userprofile__in=patients).count(), 3 * 26)
+        self.assertTrue(DailyAdherence.objects.exists() and ROMRollup.objects.exists())
+        self.assertTrue(self.client.login(username='seed-clinician-001', password=SEED_PASSWORD))
+        with self.assertRaises(CommandError):
+            call_command('seed_cohort', patients=1, stdout=StringIO())
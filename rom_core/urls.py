@@ -12,13 +12,24 @@ urlpatterns = [
     path('rom-test/', views.rom_test_intro, name='rom_test_intro'),
     path('rom-test/run/<str:rom_type>/', views.rom_test_measure, name='rom_test_measure'),
     path('save-rom-test/', views.save_rom_test, name='save_rom_test'),
+    path('save-rom-test/batch/', views.save_rom_test_batch, name='save_rom_test_batch'),
+    path('rom-test/frames/<str:rom_type>/', views.measure_rom_frames, name='measure_rom_frames'),
     path('rom-history/trend/', views.rom_history_trend, name='rom_history_trend'),
     path('rom-history/log/', views.rom_history_log, name='rom_history_log'),
+    path('rom-history/log/page/', views.rom_history_log_page, name='rom_history_log_page'),
+    path('rom-history/series/', views.rom_series, name='rom_series'),
     path('rehab/', views.rehab_program, name='rehab_program'),
     path('rehab/mark/<int:exercise_id>/', views.mark_exercise_complete, name='mark_exercise_complete'),
     path('clinician/resolve_warning/<int:warning_id>/', views.resolve_warning, name='resolve_warning'),
+    path('clinician/resolve_warnings/', views.resolve_warnings, name='resolve_warnings'),
     path('chatbot/ask/', views.chatbot_ask, name='chatbot_ask'),
+    path('chatbot/cache-stats/', views.chatbot_cache_stats, name='chatbot_cache_stats'),
     path('export/pdf/', views.export_rom_pdf, name='export_rom_pdf'),
+    path('reports/', views.report_submit, name='report_submit'),
+    path('reports/<int:job_id>/', views.report_status, name='report_status'),
+    path('reports/<int:job_id>/download/', views.report_download, name='report_download'),
+    path('clinician/reports/', views.bulk_report_submit, name='bulk_report_submit'),
+    path('clinician/export/', views.export_cohort, name='export_cohort'),
 
 
 ]
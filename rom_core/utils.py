@@ -1,70 +1,52 @@
+import numpy as np
+
 from .models import ROMTest, ROMWarning
-from datetime import date
+from .risk import RISK_RULES, ROM_FIELDS, evaluate_rules, history_windows, max_window, rule_details
 
-def check_frozen_shoulder_risk(user):
-    """
-    Checks the last 3 ROMTest entries for various clinical risk patterns.
-    Adds a ROMWarning if a pattern is detected and not already present today.
+
+def check_frozen_shoulder_risk(user, since=None):
     """
+    Checks the patient's latest ROMTest entries against the rules in risk.RISK_RULES.
+    Adds or refreshes a ROMWarning for each pattern detected, in one upsert.
+    The window is read with one query on the (user, -timestamp, -id) index.
 
-    recent_tests = ROMTest.objects.filter(user=user).order_by('-timestamp')[:3]
+    With ``since`` (the oldest timestamp of an offline batch), every test from
+    then on is checked against the window ending at it, as if each had been
+    saved on its own, in one vectorized pass over that tail of the history.
+    """
 
-    if len(recent_tests) < 3:
+    window = max_window()
+    tests = ROMTest.objects.filter(user=user).values_list('timestamp', *ROM_FIELDS)
+    if since is None:
+        rows = list(tests.order_by('-timestamp', '-id')[:window])[::-1]
+        first = len(rows) - 1
+    else:
+        # The tests just before the tail fill its first windows
+        rows = list(tests.filter(timestamp__lt=since).order_by('-timestamp', '-id')[:window - 1])[::-1]
+        first = len(rows)
+        rows += tests.filter(timestamp__gte=since).order_by('timestamp', 'id')
+
+    if first < 0 or first >= len(rows):
         return  # Not enough data to check trends
 
-    # Gather values for each type
-    flexion_vals    = [test.flexion for test in recent_tests if test.flexion is not None]
-    extension_vals  = [test.extension for test in recent_tests if test.extension is not None]
-    abduction_vals  = [test.abduction for test in recent_tests if test.abduction is not None]
-    adduction_vals  = [test.adduction for test in recent_tests if test.adduction is not None]
-
-    # Example rules (edit thresholds as needed for your clinic!)
-    today = recent_tests[0].timestamp.date()
-
-    # Flexion < 90° three times in a row
-    if len(flexion_vals) == 3 and all(v < 90 for v in flexion_vals):
-        ROMWarning.objects.get_or_create(
-            user=user,
-            date=today,
-            warning_type="Flexion Low",
-            defaults={'details': f"Last 3: {flexion_vals}"}
+    values = np.array([row[1:] for row in rows], dtype=float)
+    windows_by_field = {
+        field: history_windows(values[:, i], window)[first:]
+        for i, field in enumerate(ROM_FIELDS)
+    }
+
+    # A later test on the same day refreshes the details, as a single save would
+    found = {}
+    for rule, mask in evaluate_rules(windows_by_field, RISK_RULES).items():
+        for i in np.flatnonzero(mask):
+            found[rows[first + i][0].date(), rule.warning_type] = rule_details(rule, windows_by_field[rule.field][i])
+    if found:
+        ROMWarning.objects.bulk_create(
+            [
+                ROMWarning(user=user, date=day, warning_type=warning_type, details=details)
+                for (day, warning_type), details in found.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['user', 'date', 'warning_type'],
+            update_fields=['details'],
         )
-
-    # Extension < 30° three times in a row
-    if len(extension_vals) == 3 and all(v < 30 for v in extension_vals):
-        ROMWarning.objects.get_or_create(
-            user=user,
-            date=today,
-            warning_type="Extension Low",
-            defaults={'details': f"Last 3: {extension_vals}"}
-        )
-
-    # Abduction < 90° three times in a row
-    if len(abduction_vals) == 3 and all(v < 90 for v in abduction_vals):
-        ROMWarning.objects.get_or_create(
-            user=user,
-            date=today,
-            warning_type="Abduction Low",
-            defaults={'details': f"Last 3: {abduction_vals}"}
-        )
-
-    # Adduction < 10° three times in a row (threshold is low because normal is up to 30)
-    if len(adduction_vals) == 3 and all(v < 10 for v in adduction_vals):
-        ROMWarning.objects.get_or_create(
-            user=user,
-            date=today,
-            warning_type="Adduction Low",
-            defaults={'details': f"Last 3: {adduction_vals}"}
-        )
-
-    # Example: >50% drop in abduction vs. previous average (skip if not enough data)
-    if len(recent_tests) == 3:
-        this_abd = recent_tests[0].abduction
-        prev_abd_avg = (recent_tests[1].abduction + recent_tests[2].abduction) / 2
-        if prev_abd_avg > 0 and this_abd < 0.5 * prev_abd_avg:
-            ROMWarning.objects.get_or_create(
-                user=user,
-                date=today,
-                warning_type="Abduction Dropped >50%",
-                defaults={'details': f"Today: {this_abd:.1f}, Prev avg: {prev_abd_avg:.1f}"}
-            )